@@ -1,12 +1,16 @@
 import streamlit as st
-import pandas as pd
 from io import BytesIO
-import random
 from datetime import datetime, timedelta
 import lib
-from lib import visualize_variant_flow
-import xml.etree.ElementTree as ET
+from lib import DirectlyFollowsGraph, cached_variant_flow
+from editing import (
+    PATH_SEPARATOR, activity_table, apply_activity_table, apply_variant_table, describe_changes, variant_table
+)
+from registry import ActivityRegistry
+from generator import default_case_count, expected_variant_weights, generate_chunks, is_anomaly, route_number
+from writers import write_excel, write_parquet, write_xes
 import re
+import os
 
 ROUTE_DISTRIBUTION = {
     1: 4,  # Failed stock check
@@ -24,7 +28,6 @@ ROUTE_DISTRIBUTION = {
     108: 1,
     9: 5   # Any payment not successful
 }
-TOTAL_CASES = sum(ROUTE_DISTRIBUTION.values())
 
 # App Title
 st.title("Business Process Event Log Generator")
@@ -32,8 +35,6 @@ st.title("Business Process Event Log Generator")
 # Step 1: Basic Process Details
 st.header("Step 1: Process Setup")
 process_name = st.text_input("Process Name (Optional)")
-num_cases = TOTAL_CASES
-st.write(f"Total Cases to Simulate: **{TOTAL_CASES}** (Distributed across routes)")
 file_name = st.text_input("Event Log File Name", value="event_log.xlsx")
 
 st.write("---")  # Separator
@@ -63,17 +64,18 @@ DEFAULT_ACTIVITIES = [
     {"name": "Transmit shipping confirmation to Customer", "min_time": 10, "max_time": 60, "concurrent": False, "pool": "Tchibo", "lane": "Sales"},
     {"name": "Inform customer about order cancellation", "min_time": 1, "max_time": 3, "concurrent": False, "pool": "Tchibo", "lane": "Sales"},
     {"name": "Create customer order", "min_time": 25, "max_time": 300, "concurrent": False, "pool": "Tchibo", "lane": "Sales"},
-    {"name": "Perfom customer credit check", "min_time": 1, "max_time": 3, "concurrent": False, "pool": "Tchibo", "lane": "Risk Management"},
+    {"name": "Perform customer credit check", "min_time": 1, "max_time": 3, "concurrent": False, "pool": "Tchibo", "lane": "Risk Management"},
     {"name": "Cancel order and notify customer", "min_time": 5, "max_time": 15, "concurrent": False, "pool": "Tchibo", "lane": "Risk Management"},
     {"name": "Enable customer to choose any payment method", "min_time": 3, "max_time": 10, "concurrent": False, "pool": "Tchibo", "lane": "Risk Management"}
 ]
 
-# Initialize Session State with Hardcoded Activities
-if 'activities' not in st.session_state:
-    st.session_state.activities = DEFAULT_ACTIVITIES.copy()
+# Initialize Session State with Hardcoded Activities, kept under stable IDs
+if 'registry' not in st.session_state:
+    st.session_state.registry = ActivityRegistry(DEFAULT_ACTIVITIES)
+registry = st.session_state.registry
 
 def add_activity():
-    st.session_state.activities.append({
+    st.session_state.registry.add({
         "name": "", 
         "resource": "", 
         "min_time": 1,
@@ -84,83 +86,115 @@ def add_activity():
         "anomaly_possible": False
     })
 
-st.button("Add Activity", on_click=add_activity)
-
-# Display Activity Inputs in Expanders
-for i, activity in enumerate(st.session_state.activities):
-    with st.expander(f"Activity {i + 1}: {activity['name'] or 'Unnamed'}"):
-        # Activity Name and Resource
-        updated_name = st.text_input(
-            "Activity Name",
-            value=activity['name'],
-            key=f"name_{i}"
+DETAIL_WIDGET_KEYS = ("name_", "pool_", "lane_", "min_time_", "max_time_", "concurrent_")
+
+# Editing Mode: detailed editors apply every change at once, tables apply all edits on submit
+EDIT_MODES = ["Detailed", "Table (apply on submit)"]
+table_mode = st.radio("Editing Mode", EDIT_MODES, horizontal=True, key="edit_mode") == EDIT_MODES[1]
+if "edit_summary" in st.session_state:
+    st.success(st.session_state.pop("edit_summary"))
+
+if table_mode:
+    with st.form("activity_table"):
+        edited_activities = st.data_editor(
+            activity_table(registry),
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "#": None,
+                "name": st.column_config.TextColumn("Activity Name"),
+                "min_time": st.column_config.NumberColumn("Min Time (seconds)", min_value=1, step=1),
+                "max_time": st.column_config.NumberColumn("Max Time (seconds)", min_value=1, step=1),
+                "concurrent": st.column_config.CheckboxColumn("Allow Parallel Execution"),
+                "pool": st.column_config.TextColumn("Pool"),
+                "lane": st.column_config.TextColumn("Lane"),
+            },
+            key="activity_editor"
         )
-
-        # Sync name change across all variants
-        if updated_name != activity['name']:
-            old_name = activity['name']
-            st.session_state.activities[i]['name'] = updated_name
-
-            # Update all variants referencing this activity
-            for variant in st.session_state.variants:
-                variant['activities'] = [
-                    updated_name if act == old_name else act for act in variant['activities']
-                ]
+        activities_submitted = st.form_submit_button("Apply Activity Changes")
+    if activities_submitted:
+        try:
+            summary = apply_activity_table(registry, edited_activities)
+        except ValueError as e:
+            st.error(str(e))  # nothing was applied, the table keeps the edits
+        else:
+            # The detailed editors keep their own widget state per activity
+            for key in [k for k in st.session_state if k.startswith(DETAIL_WIDGET_KEYS)]:
+                del st.session_state[key]
+            del st.session_state["activity_editor"]
+            st.session_state.edit_summary = f"Activities updated: {describe_changes(summary)}"
             st.rerun()
+else:
+    st.button("Add Activity", on_click=add_activity)
+
+    # Display Activity Inputs in Expanders, widgets keyed by activity ID
+    for i, (activity_id, activity) in enumerate(list(registry.activities.items())):
+        with st.expander(f"Activity {i + 1}: {activity['name'] or 'Unnamed'}"):
+            # Activity Name and Resource
+            updated_name = st.text_input(
+                "Activity Name",
+                value=activity['name'],
+                key=f"name_{activity_id}"
+            )
 
-        # Pool and Lane Inputs
-        col3, col4 = st.columns(2)
-        activity['pool'] = col3.text_input(
-            "Pool", 
-            value=activity['pool'], 
-            key=f"pool_{i}"
-        )
-        activity['lane'] = col4.text_input(
-            "Lane", 
-            value=activity['lane'], 
-            key=f"lane_{i}"
-        )
+            # Variants reference the activity by ID, so only the registry changes
+            if updated_name != activity['name']:
+                registry.rename(activity_id, updated_name)
+                st.rerun()
+
+            # Pool and Lane Inputs
+            col3, col4 = st.columns(2)
+            activity['pool'] = col3.text_input(
+                "Pool", 
+                value=activity['pool'], 
+                key=f"pool_{activity_id}"
+            )
+            activity['lane'] = col4.text_input(
+                "Lane", 
+                value=activity['lane'], 
+                key=f"lane_{activity_id}"
+            )
         
-        #Directly Update Session State for Min and Max Time Inputs
-        if f"min_time_{i}" not in st.session_state:
-            st.session_state[f"min_time_{i}"] = activity['min_time']
+            #Directly Update Session State for Min and Max Time Inputs
+            if f"min_time_{activity_id}" not in st.session_state:
+                st.session_state[f"min_time_{activity_id}"] = activity['min_time']
         
-        if f"max_time_{i}" not in st.session_state:
-            st.session_state[f"max_time_{i}"] = activity['max_time']
-
-        # Time Input for Min and Max Duration (Real-time Update)
-        col1, col2 = st.columns(2)
-        activity['min_time'] = col1.number_input(
-            "Min Time (seconds)", 
-            min_value=1, 
-            value=st.session_state[f"min_time_{i}"], 
-            key=f"min_time_{i}"
-        )
-        activity['max_time'] = col2.number_input(
-            "Max Time (seconds)", 
-            min_value=1, 
-            value=st.session_state[f"max_time_{i}"], 
-            key=f"max_time_{i}"
-        )
+            if f"max_time_{activity_id}" not in st.session_state:
+                st.session_state[f"max_time_{activity_id}"] = activity['max_time']
+
+            # Time Input for Min and Max Duration (Real-time Update)
+            col1, col2 = st.columns(2)
+            activity['min_time'] = col1.number_input(
+                "Min Time (seconds)", 
+                min_value=1, 
+                value=st.session_state[f"min_time_{activity_id}"], 
+                key=f"min_time_{activity_id}"
+            )
+            activity['max_time'] = col2.number_input(
+                "Max Time (seconds)", 
+                min_value=1, 
+                value=st.session_state[f"max_time_{activity_id}"], 
+                key=f"max_time_{activity_id}"
+            )
 
-        # Real-time Session State Sync
-        st.session_state.activities[i]['min_time'] = st.session_state[f"min_time_{i}"]
-        st.session_state.activities[i]['max_time'] = st.session_state[f"max_time_{i}"]
+            # Real-time Session State Sync
+            activity['min_time'] = st.session_state[f"min_time_{activity_id}"]
+            activity['max_time'] = st.session_state[f"max_time_{activity_id}"]
         
-        # Concurrency Checkbox
-        activity['concurrent'] = st.checkbox(
-            "Allow Parallel Execution", 
-            value=activity['concurrent'], 
-            key=f"concurrent_{i}"
-        )
+            # Concurrency Checkbox
+            activity['concurrent'] = st.checkbox(
+                "Allow Parallel Execution", 
+                value=activity['concurrent'], 
+                key=f"concurrent_{activity_id}"
+            )
         
-        # Delete Activity Button
-        if st.button(f"Delete Activity {i + 1}", key=f"delete_{i}"):
-            del st.session_state.activities[i]
-            st.experimental_rerun()  # Rerun to reflect deletion immediately
+            # Delete Activity Button
+            if st.button(f"Delete Activity {i + 1}", key=f"delete_{activity_id}"):
+                registry.remove(activity_id)
+                st.experimental_rerun()  # Rerun to reflect deletion immediately
 
 # --- Validation for Unique Activity Names ---
-activity_names = [a['name'] for a in st.session_state.activities]
+activity_names = registry.names()
 
 if len(activity_names) != len(set(activity_names)):
     st.error("Activity names must be unique.")
@@ -171,6 +205,8 @@ st.header("Step 3: Define Process Flow Variants")
 DEFAULT_VARIANTS = [
     {
         "name": "Route 1: Failed Stock Availability Check",
+        "route": 1,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -183,6 +219,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 2: Fraud Cancel",
+        "route": 2,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -199,6 +237,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 3: Any Payment Successful (but loop failed once)",
+        "route": 3,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -206,7 +246,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Set order to pre-paid condition",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -229,6 +269,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 4: Successful Fraud Check, Paid",
+        "route": 4,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -255,6 +297,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 5: Successful Fraud Check, Not Paid (Canceled)",
+        "route": 5,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -274,6 +318,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 6: Credit Check Prepayment, Successfully Paid",
+        "route": 6,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -281,7 +327,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Set order to pre-paid condition",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -300,6 +346,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 7: Credit Check Prepayment, Canceled/Not Paid",
+        "route": 7,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -319,6 +367,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 8: Any Payment Successful (Straightforward)",
+        "route": 8,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -326,7 +376,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Enable customer to choose any payment method",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -345,6 +395,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 9: Any Payment Not Successful",
+        "route": 9,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -364,6 +416,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 1: (Error) Failed Stock Availability Check",
+        "route": 1,
+        "anomaly": True,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -376,6 +430,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 2: (Error) Fraud Cancel",
+        "route": 2,
+        "anomaly": True,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -390,6 +446,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 3: (Error) Any Payment Successful (but loop failed once)",
+        "route": 3,
+        "anomaly": True,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -397,7 +455,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Set order to pre-paid condition",
             "Mark the order as paid",  # Out of order before instructions
             "Provide payment instructions to customer",
@@ -419,6 +477,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 7: (Error) Credit Check Prepayment, Canceled/Not Paid",
+        "route": 7,
+        "anomaly": True,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -437,6 +497,8 @@ DEFAULT_VARIANTS = [
     },
 {
         "name": "Route 8: (Error) Any Payment Successful (Straightforward)",
+        "route": 8,
+        "anomaly": True,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -444,7 +506,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Enable customer to choose any payment method",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -464,41 +526,51 @@ DEFAULT_VARIANTS = [
     },
 ]
 
-# Initialize Session State with Hardcoded Variants
+# Initialize Session State with Hardcoded Variants, referencing activities by ID
 if 'variants' not in st.session_state:
-    st.session_state.variants = DEFAULT_VARIANTS.copy()
+    st.session_state.variants, st.session_state.unknown_activities = [], []
+    for variant in DEFAULT_VARIANTS:
+        bound, unknown = registry.bind_variant(variant)
+        st.session_state.variants.append(bound)
+        st.session_state.unknown_activities += [(variant['name'], act, registry.suggest(act)) for act in unknown]
+
+# Names that match no activity would otherwise drop out of their variant unnoticed
+for variant_name, act, suggestion in st.session_state.unknown_activities:
+    hint = f" Did you mean '{suggestion}'?" if suggestion else ""
+    st.warning(f"{variant_name}: '{act}' is not a defined activity and was left out.{hint}")
 
 # Ensure each variant has times for all activities based on DEFAULT_ACTIVITIES
 for variant in st.session_state.variants:
-    for activity in st.session_state.activities:
-        if activity['name'] not in variant['times']:
+    for activity_id, activity in registry.activities.items():
+        if activity_id not in variant['times']:
             # If activity doesn't exist at all, set default times
-            variant['times'][activity['name']] = {
+            variant['times'][activity_id] = {
                 'min': activity['min_time'],
                 'max': activity['max_time']
             }
         else:
             # If activity exists but min/max are missing, set individually
-            if 'min' not in variant['times'][activity['name']]:
-                variant['times'][activity['name']]['min'] = activity['min_time']
-            if 'max' not in variant['times'][activity['name']]:
-                variant['times'][activity['name']]['max'] = activity['max_time']
+            if 'min' not in variant['times'][activity_id]:
+                variant['times'][activity_id]['min'] = activity['min_time']
+            if 'max' not in variant['times'][activity_id]:
+                variant['times'][activity_id]['max'] = activity['max_time']
 
 # Normalize the frequencies to ensure they sum to 100%
+# Each variant is weighted by its route (route key or "Route N" in the name), as in the generator
 normalized_frequencies = []
 total_sum = 0
+variant_weights = expected_variant_weights(st.session_state.variants, ROUTE_DISTRIBUTION)
+total_weight = sum(variant_weights)
 
-for i, variant in enumerate(st.session_state.variants):
-    route_number = i + 1  # Route numbers 1-9
-    raw_frequency = ROUTE_DISTRIBUTION.get(route_number, 0)
-    frequency = (raw_frequency / TOTAL_CASES) * 100
+for weight in variant_weights:
+    frequency = (weight / total_weight) * 100 if total_weight else 0
     rounded_frequency = round(frequency, 10)  # Limit to avoid floating-point issues
     normalized_frequencies.append(rounded_frequency)
     total_sum += rounded_frequency
 
 # Adjust for rounding error
 rounding_error = 100 - total_sum
-if rounding_error != 0:
+if total_sum and rounding_error != 0:
     normalized_frequencies[-1] += rounding_error  # Adjust last variant to balance to 100%
 
 # Assign the corrected frequencies back
@@ -506,84 +578,130 @@ for i, variant in enumerate(st.session_state.variants):
     variant['frequency'] = normalized_frequencies[i]
 
 def add_variant():
-    default_times = {
-        a['name']: {'min': a['min_time'], 'max': a['max_time']} 
-        for a in st.session_state.activities
-    }
+    default_times = st.session_state.registry.default_times()
     st.session_state.variants.append({
         "name": "",
-        "activities": [],
+        "activity_ids": [],
         "frequency": 0,
         "times": default_times
     })
 
-st.button("Add Variant", on_click=add_variant)
-
 # Variant Management and Display
+VARIANT_WIDGET_KEYS = ("variant_name_", "variant_route_", "variant_anomaly_", "select_activities_", "toggle_", "min_time_variant_", "max_time_variant_")
 total_frequency = 0
 
-for v_index, variant in enumerate(st.session_state.variants):
-    with st.expander(f"{variant['name'] or 'Unnamed'}"):
-        updated_name = st.text_input(
-            "Variant Name",
-            value=variant['name'],
-            key=f"variant_name_{v_index}"
+if table_mode:
+    with st.form("variant_table"):
+        edited_variants = st.data_editor(
+            variant_table(st.session_state.variants, registry),
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "#": None,
+                "name": st.column_config.TextColumn("Variant Name"),
+                "route": st.column_config.NumberColumn("Route", min_value=1, step=1),
+                "anomaly": st.column_config.CheckboxColumn("Anomaly"),
+                "activities": st.column_config.TextColumn(f"Activities (separated by {PATH_SEPARATOR.strip()})"),
+            },
+            key="variant_editor"
         )
-        if updated_name != variant['name']:
-            st.session_state.variants[v_index]['name'] = updated_name
-            st.rerun()
-
-        # Display Frequency as Read-Only (calculated from distribution)
-        st.write(f"**Frequency:** {variant['frequency']}%")
-
-        # --- Update Selected Activities ---
-        selected_activities = st.multiselect(
-            f"Select Activities for Variant {v_index + 1}",
-            options=[a['name'] for a in st.session_state.activities],
-            default=[
-                act for act in variant['activities'] if act in [a['name'] for a in st.session_state.activities]
-            ],
-            key=f"select_activities_{v_index}"
+        variants_submitted = st.form_submit_button("Apply Variant Changes")
+    if variants_submitted:
+        st.session_state.variants, summary, unknown = apply_variant_table(
+            st.session_state.variants, edited_variants, registry
         )
-        if selected_activities != variant['activities']:
-            st.session_state.variants[v_index]['activities'] = selected_activities
-
-        # --- Adjust Time Ranges (Optional Per Variant) ---
-        if selected_activities:
-            adjust_times_toggle = st.toggle(
-                f"Adjust Time Ranges for Variant {v_index + 1}",
-                key=f"toggle_{v_index}"
+        for key in [k for k in st.session_state if k.startswith(VARIANT_WIDGET_KEYS)]:
+            del st.session_state[key]
+        del st.session_state["variant_editor"]
+        st.session_state.edit_summary = f"Variants updated: {describe_changes(summary)}"
+        if unknown:
+            st.session_state.edit_summary += ". Unknown activities left out: " + ", ".join(
+                f"{act} (did you mean '{suggestion}'?)" if suggestion else act for act, suggestion in unknown.items()
+            )
+        st.rerun()
+else:
+    st.button("Add Variant", on_click=add_variant)
+
+    for v_index, variant in enumerate(st.session_state.variants):
+        with st.expander(f"{variant['name'] or 'Unnamed'}"):
+            updated_name = st.text_input(
+                "Variant Name",
+                value=variant['name'],
+                key=f"variant_name_{v_index}"
             )
+            if updated_name != variant['name']:
+                st.session_state.variants[v_index]['name'] = updated_name
+                st.rerun()
+
+            # Route and anomaly flag resolve the variant against ROUTE_DISTRIBUTION
+            col1, col2 = st.columns(2)
+            variant['route'] = col1.number_input(
+                "Route",
+                min_value=1,
+                value=route_number(variant),
+                key=f"variant_route_{v_index}"
+            )
+            variant['anomaly'] = col2.checkbox(
+                "Anomaly (Error Variant)",
+                value=is_anomaly(variant),
+                key=f"variant_anomaly_{v_index}"
+            )
+
+            # Display Frequency as Read-Only (calculated from distribution)
+            st.write(f"**Frequency:** {variant['frequency']}%")
+
+            # --- Update Selected Activities ---
+            selected_ids = st.multiselect(
+                f"Select Activities for Variant {v_index + 1}",
+                options=list(registry.activities),
+                default=[act for act in variant['activity_ids'] if act in registry],
+                format_func=registry.name_of,
+                key=f"select_activities_{v_index}"
+            )
+            if selected_ids != variant['activity_ids']:
+                st.session_state.variants[v_index]['activity_ids'] = selected_ids
+
+            # --- Adjust Time Ranges (Optional Per Variant) ---
+            if selected_ids:
+                adjust_times_toggle = st.toggle(
+                    f"Adjust Time Ranges for Variant {v_index + 1}",
+                    key=f"toggle_{v_index}"
+                )
             
-            if adjust_times_toggle:
-                for act in selected_activities:
-                    col1, col2 = st.columns(2)
-                    act_min = col1.number_input(
-                        f"{act} - Min Time (seoconds)",
-                        min_value=None,
-                        value=variant['times'].get(act, {}).get('min', 1),
-                        key=f"min_time_variant_{v_index}_{act}"
-                    )
-                    act_max = col2.number_input(
-                        f"{act} - Max Time (seconds)",
-                        min_value=None,
-                        value=variant['times'].get(act, {}).get('max', 5),
-                        key=f"max_time_variant_{v_index}_{act}"
-                    )
-
-                    # Sync time adjustments directly to session state
-                    if act_min != variant['times'][act]['min'] or act_max != variant['times'][act]['max']:
-                        st.session_state.variants[v_index]['times'][act] = {'min': act_min, 'max': act_max}
-
-        # --- Visualize the Flow of Activities for this Variant ---
-        if selected_activities:
-            st.subheader("Process Flow Visualization")
-            st.graphviz_chart(visualize_variant_flow(variant['name'], selected_activities))
-
-        # --- Delete Variant Button ---
-        if st.button(f"Delete Variant {v_index + 1}", key=f"delete_variant_{v_index}"):
-            del st.session_state.variants[v_index]
-            st.rerun()
+                if adjust_times_toggle:
+                    for act in selected_ids:
+                        col1, col2 = st.columns(2)
+                        act_min = col1.number_input(
+                            f"{registry.name_of(act)} - Min Time (seoconds)",
+                            min_value=None,
+                            value=variant['times'].get(act, {}).get('min', 1),
+                            key=f"min_time_variant_{v_index}_{act}"
+                        )
+                        act_max = col2.number_input(
+                            f"{registry.name_of(act)} - Max Time (seconds)",
+                            min_value=None,
+                            value=variant['times'].get(act, {}).get('max', 5),
+                            key=f"max_time_variant_{v_index}_{act}"
+                        )
+
+                        # Sync time adjustments directly to session state
+                        if act_min != variant['times'][act]['min'] or act_max != variant['times'][act]['max']:
+                            st.session_state.variants[v_index]['times'][act] = {'min': act_min, 'max': act_max}
+
+            # --- Visualize the Flow of Activities for this Variant ---
+            # Streamlit runs collapsed expanders too, so the diagram is only drawn on request
+            if selected_ids and st.toggle(f"Show Process Flow for Variant {v_index + 1}", key=f"show_flow_{v_index}"):
+                named = registry.named_variant(variant)
+                st.subheader("Process Flow Visualization")
+                try:
+                    st.graphviz_chart(cached_variant_flow(named['name'], named['activities'], named.get('parallel', [])))
+                except ValueError as e:
+                    st.error(str(e))  # the generator rejects this variant too
+
+            # --- Delete Variant Button ---
+            if st.button(f"Delete Variant {v_index + 1}", key=f"delete_variant_{v_index}"):
+                del st.session_state.variants[v_index]
+                st.rerun()
 
 # --- Recalculate Total Frequency AFTER Inputs ---
 for variant in st.session_state.variants:
@@ -594,9 +712,36 @@ st.write(f"**Total Frequency: {total_frequency}%**")
 if total_frequency != 100:
     st.warning("The total frequency should sum to 100% to ensure balanced case distribution.")
 
+# --- Merged Process Model of all Variants ---
+# Kept in the session so that a rerun only recomputes the edges of changed variants
+if 'process_graph' not in st.session_state:
+    st.session_state.process_graph = DirectlyFollowsGraph()
+process_graph = st.session_state.process_graph
+# Same route weights the generator draws cases by, as a share of all cases in %
+variant_weights = expected_variant_weights(st.session_state.variants, ROUTE_DISTRIBUTION)
+total_weight = sum(variant_weights) or 1
+drawn = []
+for v_index, variant in enumerate(st.session_state.variants):
+    named = registry.named_variant(variant)
+    try:
+        process_graph.update(v_index, named['activities'], 100 * variant_weights[v_index] / total_weight,
+                             named.get('parallel', []), named['name'])
+    except ValueError as e:
+        st.error(str(e))  # left out of the merged model, as the generator rejects it
+        continue
+    drawn.append(v_index)
+process_graph.retain(drawn)
+if st.toggle("Show Merged Process Model (edges weighted by share of cases in %)", key="show_process_graph"):
+    st.graphviz_chart(process_graph.to_graphviz())
+
 # Step 4: Generate Event Log
 st.header("Step 4: Generate Event Log")
 
+# By default as many cases as the variant pool holds, like the generator and the CLI
+pool_cases = max(1, default_case_count(st.session_state.variants, ROUTE_DISTRIBUTION))
+num_cases = st.number_input("Total Cases to Simulate", min_value=1, value=pool_cases, step=1)
+st.write(f"Cases are distributed across routes by ROUTE_DISTRIBUTION (default: **{pool_cases}** cases)")
+
 # Date Inputs for Case Start Time
 start_date = st.date_input("Select Start Date", value=datetime.today())
 end_date = st.date_input("Select End Date", value=datetime.today() + timedelta(days=7))
@@ -605,133 +750,64 @@ end_date = st.date_input("Select End Date", value=datetime.today() + timedelta(d
 min_case_gap = st.number_input("Minimum Gap Between Cases (seconds)", min_value=0, value=600)
 max_case_gap = st.number_input("Maximum Gap Between Cases (seconds)", min_value=900, value=1800)
 
-if st.button("Generate Event Log"):
-    if not st.session_state.activities or not st.session_state.variants:
-        st.error("Please add at least one activity and one variant before generating the event log.")
-    elif start_date > end_date:
-        st.error("End date must be after start date.")
-    else:
-        event_log = []
-        route_case_counter = {route: 1 for route in range(1, 10)}
-        total_cases = sum(ROUTE_DISTRIBUTION.values())
-        variant_pool = []
-
-        case_prefix = "R"
-        last_case_end_time = None
-
-        # --- Fill Variant Pool Based on Exact Distribution ---
-        for route, num_cases in ROUTE_DISTRIBUTION.items():
-            matching_variants = [
-                v for v in st.session_state.variants if f"Route {route}" in v['name']
-            ]
-            error_variants = [
-                v for v in st.session_state.variants if f"Route {route}" in v['name'] and "(Error)" in v['name']
-            ]
-            # Add normal cases based on ROUTE_DISTRIBUTION
-            for variant in matching_variants:
-                variant_pool.extend([variant] * num_cases)
-            
-            # Add only ONE error case if it exists
-            if error_variants:
-                variant_pool.append(random.choice(error_variants))
-        random.shuffle(variant_pool)
-
-        # --- Generate Cases for Each Variant ---
-        for variant in variant_pool:  # Randomly select a variant from the pool
-            route_number = int(variant['name'].split(':')[0].split()[-1])
-            case_num = route_case_counter[route_number]
-            route_case_counter[route_number] += 1
-
-            # Format Case ID according to route and sequence
-            #case_id_formatted = f"{case_prefix}{route_number}_{str(case_num).zfill(2)}"
-            is_anomaly = "(Error)" in variant['name']
-
-            # Format Case ID with error marker if anomaly
-            case_id_formatted = (
-                f"{case_prefix}{route_number}_{str(case_num).zfill(2)}E" if is_anomaly
-                else f"{case_prefix}{route_number}_{str(case_num).zfill(2)}"
-            )
-
-            # Berechne die Differenz zwischen Start- und Enddatum
-            date_diff = (end_date - start_date).days
-
-            # Berechne die Anzahl der Fälle, die generiert werden sollen
-            total_cases = sum(ROUTE_DISTRIBUTION.values())
-
-            # Berechne den maximalen Zeitraum, der durch die Gaps benötigt wird
-            max_required_gap = (total_cases - 1) * max_case_gap / 86400  # in Tagen (3600 Sekunden * 24 Stunden)
+# Arrival Process for Case Start Times
+ARRIVAL_PROCESSES = {
+    "Random start within the date window": "window",
+    "Sequential with case gaps": "gaps",
+    "Poisson over the date window": "poisson",
+    "Poisson weighted by time of day": "weighted",
+}
+arrival_process = st.selectbox("Arrival Process", list(ARRIVAL_PROCESSES))
 
-            # Überprüfe, ob der Zeitraum zwischen Start- und Enddatum ausreichend ist
-            if date_diff < max_required_gap:
-                st.error("Der Zeitraum zwischen Start- und Enddatum ist zu kurz, um die gewünschten 'Case Gaps' zu berücksichtigen. Bitte wähle einen längeren Zeitraum.")
-            else:
-                # Jetzt ist sichergestellt, dass der Zeitraum ausreichend ist
-                # Hier wird weiterhin eine zufällige Startzeit für jeden Fall generiert
-                case_start_time = datetime.combine(
-                    random.choice(pd.date_range(start_date, end_date).tolist()),  # Umwandlung in Liste und Auswahl eines zufälligen Datums
-                    datetime.min.time()
-                ) + timedelta(hours=random.randint(7, 8))  # Der Fall beginnt zwischen 8 Uhr und 16 Uhr
+# Export Format
+export_format = st.radio("Export Format", ["Excel", "Parquet", "XES"], horizontal=True)
+compress_xes = export_format == "XES" and st.checkbox("Compress XES (.xes.gz)")
 
-                start_time = case_start_time
-                last_activity_time = start_time
-            
-            # --- Generate Activities for the Case ---
-            for act in variant['activities']:
-                activity_info = next((a for a in st.session_state.activities if a['name'] == act), {})
-
-                # Default activity timing if not set
-                if act not in variant['times']:
-                    variant['times'][act] = {
-                        'min': activity_info.get('min_time', 60),
-                        'max': activity_info.get('max_time', 300)
-                    }
-
-                act_time_range = variant['times'].get(act, {})
-                min_time = act_time_range.get('min', 60)
-                max_time = act_time_range.get('max', 300)
-
-                # Determine concurrency behavior
-                concurrent = activity_info.get('concurrent', False)
-
-                # Calculate duration with random jitter
-                base_duration = random.randint(min_time, max_time)
-                jitter = random.randint(-4, 4)
-                duration = max(1, base_duration + jitter) 
-
-                end_time = start_time + timedelta(seconds=duration)
-
-                # Append event log entry (No ID or Resource needed anymore)
-                event_log.append({
-                    'Case ID': case_id_formatted,
-                    'Activity': act,
-                    'Timestamp': start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    'Pool': activity_info.get('pool', 'N/A'),
-                    'Lane': activity_info.get('lane', 'N/A'),
-                    'Route': f"Route {route_number}",
-                    'Anomaly': 'Yes' if is_anomaly else 'No'
-                })
-
-                # Increment start time for non-concurrent activities
-                if not concurrent:
-                    last_activity_time = start_time
-                    start_time += timedelta(seconds=duration)
-            
-            # Store end time for next case gap
-            last_case_end_time = last_activity_time
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(event_log)
+# Lifecycle: when activities complete, for service and waiting time analysis
+LIFECYCLE_OPTIONS = {
+    "Start timestamps only": None,
+    "End timestamp column": "end",
+    "Start and complete events": "pairs",
+}
+lifecycle = LIFECYCLE_OPTIONS[st.selectbox("Activity Lifecycle", list(LIFECYCLE_OPTIONS))]
 
-        # Export to Excel
+if st.button("Generate Event Log"):
+    try:
+        chunks = generate_chunks(
+            registry.to_list(),
+            [registry.named_variant(variant) for variant in st.session_state.variants],
+            ROUTE_DISTRIBUTION,
+            start_date,
+            end_date,
+            min_case_gap=min_case_gap,
+            max_case_gap=max_case_gap,
+            num_cases=int(num_cases),
+            arrivals=ARRIVAL_PROCESSES[arrival_process]
+        )
         output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Event Log')
-
+        if export_format == "Parquet":
+            # Columnar export straight from the generated chunks
+            write_parquet(chunks, output, lifecycle=lifecycle)
+            download_name = os.path.splitext(file_name)[0] + ".parquet"
+            mime = "application/vnd.apache.parquet"
+        elif export_format == "XES":
+            # IEEE XES for process-mining tools, one trace per case
+            write_xes(chunks, output, compress=compress_xes, lifecycle=lifecycle)
+            download_name = os.path.splitext(file_name)[0] + (".xes.gz" if compress_xes else ".xes")
+            mime = "application/gzip" if compress_xes else "application/xml"
+        else:
+            # Export to Excel, rows past the sheet limit continue on further sheets
+            write_excel(chunks, output, lifecycle=lifecycle)
+            download_name = file_name
+            mime = "application/vnd.ms-excel"
+    except ValueError as e:
+        st.error(str(e))
+    else:
         st.download_button(
             label="Download Event Log",
             data=output.getvalue(),
-            file_name=file_name,
-            mime="application/vnd.ms-excel"
+            file_name=download_name,
+            mime=mime
         )
 
-        st.success("Event log successfully generated with concurrency and case gaps!")
\ No newline at end of file
+        st.success("Event log successfully generated with concurrency and case gaps!")
@@ -0,0 +1,138 @@
+from datetime import date
+
+import numpy as np
+
+EPOCH = date(1970, 1, 1)
+
+# window:   independent start times, a random day and minute inside the start hours
+# gaps:     one case after the other, min_case_gap..max_case_gap seconds apart
+# poisson:  Poisson arrivals over the whole date window
+# weighted: Poisson arrivals with a time-of-day rate (hourly_weights, default: the start hours)
+ARRIVAL_MODES = ('window', 'gaps', 'poisson', 'weighted')
+
+GAP_ERROR = (
+    "Der Zeitraum zwischen Start- und Enddatum ist zu kurz, um die gewünschten "
+    "'Case Gaps' zu berücksichtigen. Bitte wähle einen längeren Zeitraum."
+)
+
+
+def start_slots(start_hours, start_minutes):
+    # Seconds of day a case may start at: every minute of the hour window
+    hours = np.arange(start_hours[0], start_hours[1] + 1, dtype=np.int64)
+    minutes = np.arange(start_minutes[0], start_minutes[1] + 1, dtype=np.int64)
+    return (hours[:, None] * 3600 + minutes * 60).ravel()
+
+
+class ArrivalScheduler:
+    """Case start times (int64 epoch seconds) for num_cases cases, drawn in batches.
+
+    Feasibility is checked once when the scheduler is created. draw() returns the
+    starts of the next cases in case order; gap and Poisson arrivals are ascending.
+    With ascending=True, window starts are ascending too, with the same distribution.
+    """
+
+    def __init__(
+        self,
+        mode,
+        start_date,
+        end_date,
+        num_cases,
+        start_hours=(7, 8),
+        start_minutes=(0, 0),
+        min_case_gap=600,
+        max_case_gap=1800,
+        hourly_weights=None,
+        ascending=False,
+    ):
+        if mode not in ARRIVAL_MODES:
+            raise ValueError(f"Unknown arrival process: {mode}")
+        if start_date > end_date:
+            raise ValueError("End date must be after start date.")
+        self.mode = mode
+        self.remaining = num_cases
+        self.window_start = (start_date - EPOCH).days * 86400
+        self.window_end = ((end_date - EPOCH).days + 1) * 86400  # exclusive
+        self.days = (end_date - start_date).days + 1
+        self.day_slots = start_slots(start_hours, start_minutes)
+        self.ascending = ascending
+        self.position = 0.0  # quantile of the last drawn arrival, for ascending draws
+
+        if mode == 'gaps':
+            if min_case_gap > max_case_gap:
+                raise ValueError("Minimum gap between cases must not exceed the maximum gap.")
+            # Even with only maximum gaps the last case has to start inside the window
+            self.next_start = self.window_start + int(self.day_slots[0])
+            if self.next_start + (num_cases - 1) * max_case_gap >= self.window_end:
+                raise ValueError(GAP_ERROR)
+            self.min_case_gap, self.max_case_gap = min_case_gap, max_case_gap
+
+        elif mode in ('poisson', 'weighted'):
+            if mode == 'poisson':
+                hourly_weights = np.ones(24)
+            elif hourly_weights is None:
+                hourly_weights = np.zeros(24)
+                hourly_weights[start_hours[0]:start_hours[1] + 1] = 1
+            hourly_weights = np.asarray(hourly_weights, dtype=np.float64)
+            if hourly_weights.shape != (24,) or (hourly_weights < 0).any() or not hourly_weights.sum():
+                raise ValueError("Hourly weights need 24 non-negative values with a positive sum.")
+            # Piecewise constant rate per hour of the window, as a cumulative distribution
+            self.hour_weights = np.tile(hourly_weights, self.days)
+            self.hour_cdf = np.cumsum(self.hour_weights) / self.hour_weights.sum()
+            self.last_hour = int(np.flatnonzero(self.hour_weights)[-1])
+
+    def draw(self, rng, size):
+        if size > self.remaining:
+            raise ValueError("More cases requested than the scheduler was created for.")
+        if self.mode == 'window':
+            starts = self._ascending_window_starts(rng, size) if self.ascending else self._window_starts(rng, size)
+        elif self.mode == 'gaps':
+            starts = self._gap_starts(rng, size)
+        else:
+            starts = self._poisson_starts(rng, size)
+        self.remaining -= size
+        return starts
+
+    def _window_starts(self, rng, size):
+        # One draw over (day x slot) for the whole batch
+        day, slot = np.divmod(rng.integers(0, self.days * len(self.day_slots), size=size), len(self.day_slots))
+        return self.window_start + day * 86400 + self.day_slots[slot]
+
+    def _gap_starts(self, rng, size):
+        gaps = rng.integers(self.min_case_gap, self.max_case_gap, size=size, endpoint=True)
+        gaps[0] = 0
+        starts = self.next_start + np.cumsum(gaps)
+        if size:
+            self.next_start = int(starts[-1]) + int(rng.integers(self.min_case_gap, self.max_case_gap, endpoint=True))
+        return starts
+
+    def _ascending_window_starts(self, rng, size):
+        # Sorted uniform quantiles over the (day x slot) cells, so the same distribution
+        # as _window_starts, but each batch starts where the previous one ended
+        cells = self.days * len(self.day_slots)
+        index = np.minimum((self._quantiles(rng, size) * cells).astype(np.int64), cells - 1)
+        day, slot = np.divmod(index, len(self.day_slots))
+        return self.window_start + day * 86400 + self.day_slots[slot]
+
+    def _quantiles(self, rng, size):
+        # Given N arrivals in the window, their quantiles are N sorted uniforms. The
+        # size-th smallest of the remaining ones is Beta distributed, the ones below it
+        # are sorted uniforms up to there, so each batch needs only its own draws.
+        if not size:
+            return np.empty(0)
+        span = 1.0 - self.position
+        last = self.position + span * rng.beta(size, self.remaining - size + 1)
+        quantiles = np.empty(size)
+        quantiles[:-1] = np.sort(rng.uniform(self.position, last, size=size - 1))
+        quantiles[-1] = last
+        self.position = last
+        return quantiles
+
+    def _poisson_starts(self, rng, size):
+        quantiles = self._quantiles(rng, size)
+
+        # Inverse of the piecewise constant distribution over the hours of the window
+        hour = np.minimum(np.searchsorted(self.hour_cdf, quantiles, side='right'), self.last_hour)
+        below = np.where(hour > 0, self.hour_cdf[hour - 1], 0.0)
+        within = (quantiles - below) / (self.hour_weights[hour] / self.hour_weights.sum())
+        seconds = (hour + np.clip(within, 0.0, 1.0)) * 3600
+        return self.window_start + np.minimum(seconds.astype(np.int64), self.window_end - self.window_start - 1)
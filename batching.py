@@ -0,0 +1,43 @@
+import heapq
+
+SHIPMENT_PERIOD = 3600  # collective shipments leave at every full hour
+
+
+def release_time(ready, period=SHIPMENT_PERIOD):
+    # End of the batch period a shipment becomes ready in; works on ints and arrays
+    return (ready // period + 1) * period
+
+
+class ShipmentBatches:
+    """Open collective-shipment batches keyed by (hour, route).
+
+    add() files a waiting case under its batch in O(1) (plus one heap push for the
+    first case of a batch). due() closes batches in release order and hands over
+    their members exactly once, so nothing is scanned twice. The discrete-event
+    engine (des.py) uses it; the vectorized engine only needs release_time().
+    """
+
+    def __init__(self, period=SHIPMENT_PERIOD):
+        self.period = period
+        self.open = {}      # (hour, route) -> members waiting for the release
+        self.closing = []   # heap of (release time, route) of the open batches
+
+    def __len__(self):
+        return len(self.open)
+
+    def add(self, ready, route, member):
+        hour = ready // self.period
+        members = self.open.get((hour, route))
+        if members is None:
+            self.open[(hour, route)] = members = []
+            heapq.heappush(self.closing, ((hour + 1) * self.period, route))
+        members.append(member)
+
+    def next_release(self):
+        return self.closing[0][0] if self.closing else None
+
+    def due(self, until):
+        # (release time, route, members) of every batch released at or before until
+        while self.closing and self.closing[0][0] <= until:
+            release, route = heapq.heappop(self.closing)
+            yield release, route, self.open.pop((release // self.period - 1, route))
@@ -0,0 +1,215 @@
+"""Command-line event log generation without Streamlit.
+
+    python -m cli generate --cases 10000 --start 2024-01-01 --end 2024-03-31 --seed 42 -o log.csv
+
+Activities, variants and ROUTE_DISTRIBUTION are read from app.py by default (parsed,
+not imported), or from files of the same shape such as aktivitäten.txt / routen.txt.
+"""
+import argparse
+import ast
+import json
+import sys
+from functools import partial
+from datetime import date, timedelta
+from pathlib import Path
+
+from arrivals import ARRIVAL_MODES
+from generator import CHUNK_SIZE, COLLECTIVE_SHIPMENT, ENGINES, LIFECYCLE_MODES, generate_chunks
+from process_model import model_from_variants
+from registry import ActivityRegistry
+from sorting import RUN_EVENTS, time_sorted_chunks
+
+DEFAULT_MODEL = Path(__file__).with_name('app.py')
+
+
+# --- Loading Process Definitions ---
+def load_definitions(path, names=('DEFAULT_ACTIVITIES', 'DEFAULT_VARIANTS', 'ROUTE_DISTRIBUTION')):
+    # JSON files hold a dict of the names (or a bare list), everything else is parsed as Python literals
+    text = Path(path).read_text(encoding='utf-8-sig')
+    if str(path).endswith('.json'):
+        data = json.loads(text)
+        if isinstance(data, list):
+            return {names[0]: data}
+        return {name: data[name] for name in names if name in data}
+
+    definitions = {}
+    for node in ast.parse(text).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name in names:
+                definitions[name] = ast.literal_eval(node.value)
+    return definitions
+
+
+def parse_distribution(value):
+    # "1=4,2=5,3=5" or a JSON / Python file containing ROUTE_DISTRIBUTION
+    if Path(value).is_file():
+        distribution = load_definitions(value, ('ROUTE_DISTRIBUTION',)).get('ROUTE_DISTRIBUTION')
+        if distribution is None:
+            raise ValueError(f"No ROUTE_DISTRIBUTION found in {value}")
+        return {int(route): weight for route, weight in distribution.items()}
+    pairs = (item.split('=') for item in value.split(',') if item.strip())
+    return {int(route): int(weight) for route, weight in pairs}
+
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {value}")
+    return number
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def parse_lane_capacity(values):
+    # ["Sales=3", "Risk Management=1"] -> {"Sales": 3, "Risk Management": 1}
+    capacity = {}
+    for value in values or []:
+        lane, sep, workers = value.rpartition('=')
+        if not sep:
+            raise ValueError(f"Lane capacity must look like LANE=WORKERS: {value}")
+        capacity[lane.strip()] = int(workers)
+    return capacity
+
+
+def output_format(args):
+    if args.format:
+        return args.format
+    suffixes = [s.lstrip('.').lower() for s in Path(args.output).suffixes]
+    if suffixes[-2:] == ['xes', 'gz']:
+        return 'xes'
+    return suffixes[-1] if suffixes else 'csv'
+
+
+# --- Commands ---
+def generate(args):
+    model = load_definitions(args.model)
+    activities = model.get('DEFAULT_ACTIVITIES')
+    variants = model.get('DEFAULT_VARIANTS')
+    distribution = model.get('ROUTE_DISTRIBUTION')
+    if args.activities:
+        activities = load_definitions(args.activities, ('DEFAULT_ACTIVITIES',)).get('DEFAULT_ACTIVITIES')
+    if args.variants:
+        variants = load_definitions(args.variants, ('DEFAULT_VARIANTS',)).get('DEFAULT_VARIANTS')
+    if args.distribution:
+        distribution = parse_distribution(args.distribution)
+    if activities and variants:
+        # Undefined names (e.g. typos) still run, but with default times and an N/A pool and lane
+        registry = ActivityRegistry(activities)
+        for variant in variants:
+            for act in registry.resolve(variant['activities'])[1]:
+                suggestion = registry.suggest(act)
+                hint = f"; did you mean '{suggestion}'?" if suggestion else ""
+                print(f"Warning: {variant['name']}: '{act}' is not a defined activity{hint}", file=sys.stderr)
+    process_model = None
+    if args.process_model and args.process_model != 'variants':
+        process_model = load_definitions(args.process_model, ('PROCESS_MODEL',)).get('PROCESS_MODEL')
+        if process_model is None:
+            raise ValueError(f"No PROCESS_MODEL found in {args.process_model}")
+    elif not distribution:
+        raise ValueError("No ROUTE_DISTRIBUTION given; use --distribution")
+    elif args.process_model:
+        # Directly-follows model of the variants, to generate paths beyond the listed ones
+        process_model = model_from_variants(variants or [], distribution)
+
+    fmt = output_format(args)
+    import writers
+    if fmt not in writers.WRITERS:
+        raise ValueError(f"Unsupported output format: {fmt}")
+    time_ordered = args.sort_by_time or args.engine == 'des'
+    if time_ordered and fmt == 'xes':
+        raise ValueError("XES groups events by trace; time-ordered output is only available for row formats")
+    encode = None
+    if fmt in writers.ENCODERS and args.workers > 1 and not time_ordered:
+        encode = partial(writers.ENCODERS[fmt], lifecycle=args.lifecycle)
+
+    chunks = generate_chunks(
+        activities or [],
+        variants or [],
+        distribution,
+        args.start,
+        args.end,
+        min_case_gap=args.min_gap,
+        max_case_gap=args.max_gap,
+        seed=args.seed,
+        start_hours=tuple(args.start_hours),
+        collective_activity=COLLECTIVE_SHIPMENT if args.collective_shipment else None,
+        num_cases=args.cases,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        arrivals=args.arrivals,
+        hourly_weights=args.hourly_weights,
+        encode=encode,
+        engine=args.engine,
+        lane_capacity=parse_lane_capacity(args.lane_capacity),
+        model=process_model,
+    )
+    if time_ordered and args.lifecycle == 'pairs':
+        # Complete events fall between later starts, so the expanded rows are sorted, also for des
+        pairs = (chunk.lifecycle_pairs() for chunk in chunks)
+        chunks = time_sorted_chunks(pairs, run_events=args.sort_run_events, directory=args.temp_dir)
+    elif args.sort_by_time and args.engine != 'des':  # the discrete-event engine is already in time order
+        chunks = time_sorted_chunks(chunks, run_events=args.sort_run_events, directory=args.temp_dir)
+    if fmt == 'xlsx':
+        count = writers.write_excel(chunks, args.output, split_files=args.excel_split_files, lifecycle=args.lifecycle)
+    elif encode:
+        # Rows were already encoded by the workers
+        count = writers.WRITERS[fmt](chunks, args.output, encoded=True, lifecycle=args.lifecycle)
+    else:
+        count = writers.WRITERS[fmt](chunks, args.output, lifecycle=args.lifecycle)
+    print(f"Wrote {count} events to {args.output}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cli', description="Business process event log generator")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    gen = commands.add_parser('generate', help="Generate an event log file")
+    gen.add_argument('-o', '--output', required=True, help="Output path ('-' writes CSV to stdout, *.xes.gz writes gzipped XES)")
+    gen.add_argument('--format', choices=['csv', 'xlsx', 'parquet', 'xes'], help="Output format (default: from the file extension)")
+    gen.add_argument('--model', default=DEFAULT_MODEL, help="Python or JSON file with DEFAULT_ACTIVITIES, DEFAULT_VARIANTS and ROUTE_DISTRIBUTION (default: app.py)")
+    gen.add_argument('--activities', help="File with DEFAULT_ACTIVITIES, e.g. aktivitäten.txt")
+    gen.add_argument('--variants', help="File with DEFAULT_VARIANTS, e.g. routen.txt")
+    gen.add_argument('--distribution', help="Route weights as '1=4,2=5,...' or a file with ROUTE_DISTRIBUTION")
+    gen.add_argument('--process-model', metavar='FILE|variants', help="Simulate random walks over a PROCESS_MODEL (JSON or Python file), or over the directly-follows model of the variants ('variants'), instead of the listed variants (Route and Anomaly then come from the model and are constant for 'variants' with the default definitions)")
+    gen.add_argument('--cases', type=non_negative_int, help="Number of cases (default: sum of ROUTE_DISTRIBUTION, which is used as relative weights)")
+    gen.add_argument('--start', type=date.fromisoformat, default=date.today(), help="Start date (YYYY-MM-DD)")
+    gen.add_argument('--end', type=date.fromisoformat, default=date.today() + timedelta(days=7), help="End date (YYYY-MM-DD)")
+    gen.add_argument('--min-gap', type=int, default=600, help="Minimum gap between cases (seconds)")
+    gen.add_argument('--max-gap', type=int, default=1800, help="Maximum gap between cases (seconds)")
+    gen.add_argument('--arrivals', choices=ARRIVAL_MODES, default='window', help="Case arrival process: random start in the window (default), sequential case gaps, Poisson, or time-of-day weighted Poisson")
+    gen.add_argument('--hourly-weights', type=float, nargs=24, metavar='W', help="Arrival rate per hour of day for --arrivals weighted (default: 1 inside --start-hours)")
+    gen.add_argument('--start-hours', type=int, nargs=2, default=[7, 8], metavar=('FIRST', 'LAST'), help="Hours of day in which cases start")
+    gen.add_argument('--chunk-size', type=positive_int, default=CHUNK_SIZE, help="Cases simulated and written per chunk (bounds memory use)")
+    gen.add_argument('--workers', type=int, default=1, help="Simulate (and for CSV/XES also format) chunks in this many processes; output does not depend on it")
+    gen.add_argument('--seed', type=int, help="Random seed for reproducible logs")
+    gen.add_argument('--collective-shipment', action='store_true', help="Batch the collective shipment activity per hour and route")
+    gen.add_argument('--engine', choices=ENGINES, default='vectorized', help="Simulate case by case in vectorized chunks (default) or as a discrete-event simulation that emits events in timestamp order")
+    gen.add_argument('--lane-capacity', action='append', metavar='LANE=WORKERS', help="Workers of a lane (repeatable); its activities queue for a free worker. Needs --engine des")
+    gen.add_argument('--sort-by-time', action='store_true', help="Write events in timestamp order (external merge sort through temporary files) instead of case by case")
+    gen.add_argument('--sort-run-events', type=positive_int, default=RUN_EVENTS, help="Events sorted in memory per temporary run for --sort-by-time")
+    gen.add_argument('--temp-dir', help="Directory for the temporary sort runs (default: the system temp directory)")
+    gen.add_argument('--lifecycle', choices=LIFECYCLE_MODES, help="Also write when activities complete: an End Timestamp column, or start/complete event pairs (XES always uses pairs)")
+    gen.add_argument('--excel-split-files', action='store_true', help="Continue in event_log_2.xlsx, ... instead of further sheets once a sheet is full")
+    gen.set_defaults(func=generate)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.output == '-' and args.format not in (None, 'csv'):
+        parser.error("Only CSV can be written to stdout")
+    try:
+        args.func(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Discrete-event simulation of a run, as an alternative to the vectorized chunks.
+
+Pending activities of all cases sit in one heap ordered by simulated time, and
+collective shipments wait in ShipmentBatches until their batch closes. Events
+are emitted as they happen, so the log comes out in timestamp order without a
+final sort, and interactions between cases cost O(log n) per event.
+
+Parallel blocks fork into one pending activity per branch and join when the
+last branch is done.
+
+Lanes with a capacity act as resources: an activity that becomes ready takes
+the worker of its lane that is free first (a heap of free times per lane) and
+starts when that worker is free, so queueing delay shows up in the timestamps.
+
+Durations are drawn exactly as simulate_chunk draws them, so without lane
+capacities both engines produce the same events for a given seed; only their
+order differs. The exception is 'window' arrivals: this engine needs arrivals
+in ascending order, so the scheduler draws window starts sorted across chunks.
+"""
+import heapq
+from itertools import count
+
+import numpy as np
+
+from batching import ShipmentBatches
+from generator import EventChunk, _groups, chunk_cases, chunk_seed, plan_durations
+
+DES_CHUNK_EVENTS = 65_536  # events per emitted EventChunk
+
+
+class _EventBuffer:
+    # Collects emitted events column-wise and hands them on as EventChunks
+    def __init__(self, catalog, size):
+        self.catalog = catalog
+        self.size = size
+        self.rows = []
+
+    def add(self, case, position, time):
+        path = case.path
+        self.rows.append((case.route, case.num, case.anomaly, path.activities[position], time,
+                          case.durations[position], path.pools[position], path.lanes[position]))
+
+    def full(self):
+        return len(self.rows) >= self.size
+
+    def flush(self):
+        columns = list(zip(*self.rows)) if self.rows else [()] * len(EventChunk.EVENT_FIELDS)
+        self.rows = []
+        dtypes = (np.int64, np.int64, bool, np.int32, np.int64, np.int64, np.int32, np.int32)
+        return EventChunk(
+            **{name: np.array(column, dtype=dtype) for name, column, dtype in zip(EventChunk.EVENT_FIELDS, columns, dtypes)},
+            catalog=self.catalog,
+        )
+
+
+class _Path:
+    # Per-variant lookups for the simulation loop
+    def __init__(self, plan):
+        self.activities = plan.activities.tolist()
+        self.pools = plan.pool.tolist()
+        self.lanes = plan.lane.tolist()
+        self.concurrent = plan.concurrent.tolist()
+        self.releases = frozenset(plan.release_positions)
+        self.end = len(plan)
+        self.following = list(range(1, len(plan) + 1))  # position entered after each one
+        self.forks = {}  # first position of a block -> first position of each branch
+        self.joins = {}  # position after a block -> number of branches to wait for
+        for branches in plan.blocks:
+            after = branches[-1][-1] + 1
+            self.forks[branches[0][0]] = tuple(branch[0] for branch in branches)
+            self.joins[after] = len(branches)
+            for branch in branches:
+                self.following[branch[-1]] = after
+
+
+class _Case:
+    __slots__ = ('route', 'num', 'anomaly', 'path', 'durations', 'waiting')
+
+    def __init__(self, route, num, anomaly, path, durations):
+        self.route, self.num, self.anomaly = route, num, anomaly
+        self.path = path
+        self.durations = durations
+        self.waiting = {}  # join position -> [branches still running, latest branch end]
+
+
+def lane_workers(catalog, lane_capacity):
+    # lane code -> heap of worker free times for every lane with a capacity
+    workers = {}
+    for lane, capacity in (lane_capacity or {}).items():
+        if lane not in catalog.lane_names:
+            raise ValueError(f"Unknown lane: {lane}")
+        if capacity < 1:
+            raise ValueError(f"Lane {lane} needs at least one worker.")
+        workers[catalog.lane_names.index(lane)] = [0] * capacity
+    return workers
+
+
+class EventSimulation:
+    """Time-ordered simulation of the cases of a run, one chunk of arrivals at a time."""
+
+    def __init__(self, context, chunk_events=DES_CHUNK_EVENTS, lane_capacity=None):
+        self.context = context
+        self.pending = []  # heap of (time, sequence, case key, path position, started)
+        self.sequence = count()
+        self.cases = {}    # case key -> _Case, while the case is running
+        self.batches = ShipmentBatches()
+        self.workers = lane_workers(context.catalog, lane_capacity)
+        self.buffer = _EventBuffer(context.catalog, chunk_events)
+        self.paths = [_Path(plan) for plan in context.plans]
+        self.now = None  # time of the last processed entry
+
+    def next_time(self):
+        times = [self.pending[0][0]] if self.pending else []
+        if len(self.batches):
+            times.append(self.batches.next_release())
+        return min(times) if times else None
+
+    def arrive(self, spec):
+        # Same draws as simulate_chunk: case order, case numbers, then durations per variant
+        plans = self.context.plans
+        rng = np.random.default_rng(chunk_seed(self.context.seed, spec.index))
+        chunk, case_routes, case_nums = chunk_cases(self.context, spec, rng)
+        if self.now is not None and len(spec.starts) and int(spec.starts.min()) < self.now:
+            # Lane workers and shipment batches before now are already handed out
+            raise ValueError("The discrete-event engine needs arrivals in ascending time order.")
+        routes, nums, starts = case_routes.tolist(), case_nums.tolist(), spec.starts.tolist()
+        for variant_index, cases in _groups(chunk):
+            plan = plans[variant_index]
+            if not len(plan):
+                continue
+            path = self.paths[variant_index]
+            for case, durations in zip(cases.tolist(), plan_durations(rng, plan, len(cases)).tolist()):
+                key = (spec.index, case)
+                self.cases[key] = _Case(routes[case], nums[case], plan.anomaly, path, durations)
+                self._enter(key, self.cases[key], 0, starts[case])
+
+    def _enter(self, key, case, position, time):
+        # The case reaches position at time: wait for the other branches of a join,
+        # fork into the branches of a block, or end after its last activity
+        path = case.path
+        branches = path.joins.get(position)
+        if branches:
+            state = case.waiting.setdefault(position, [branches, time])
+            state[0] -= 1
+            state[1] = max(state[1], time)
+            if state[0]:
+                return
+            time = case.waiting.pop(position)[1]
+        if position == path.end:
+            del self.cases[key]
+            return
+        for branch_start in path.forks.get(position, (position,)):
+            heapq.heappush(self.pending, (time, next(self.sequence), key, branch_start, False))
+
+    def _advance(self, key, position, time):
+        case = self.cases[key]
+        self._enter(key, case, case.path.following[position], time)
+
+    def _start(self, key, case, position, time):
+        # Emit an activity that starts now; concurrent activities do not hold up the case
+        self.buffer.add(case, position, time)
+        self._advance(key, position, time if case.path.concurrent[position] else time + case.durations[position])
+
+    def run_until(self, until=None):
+        # Process everything up to until (all of it without a limit); yields full EventChunks
+        while True:
+            time = self.next_time()
+            if time is None or (until is not None and time > until):
+                return
+            self.now = time
+            if len(self.batches) and self.batches.next_release() == time:
+                for release, route, members in self.batches.due(time):
+                    for key, position in members:
+                        self.buffer.add(self.cases[key], position, release)
+                        self._advance(key, position, release)  # the shipment itself takes no time
+            else:
+                time, _, key, position, started = heapq.heappop(self.pending)
+                case = self.cases[key]
+                if started:
+                    self._start(key, case, position, time)
+                elif position in case.path.releases:
+                    self.batches.add(time, case.route, (key, position))
+                elif case.path.lanes[position] in self.workers:
+                    # First-come first-served: the case takes the worker that is free first
+                    workers = self.workers[case.path.lanes[position]]
+                    start = max(time, workers[0])
+                    heapq.heapreplace(workers, start + case.durations[position])
+                    if start > time:
+                        heapq.heappush(self.pending, (start, next(self.sequence), key, position, True))
+                    else:
+                        self._start(key, case, position, time)
+                else:
+                    self._start(key, case, position, time)
+            if self.buffer.full():
+                yield self.buffer.flush()
+
+
+def simulate_events(context, specs, chunk_events=DES_CHUNK_EVENTS, lane_capacity=None):
+    # Arrivals are fed chunk by chunk, as soon as a chunk can start before the next pending
+    # event; with ascending arrivals (gaps, poisson, weighted) only few chunks are in flight
+    simulation = EventSimulation(context, chunk_events, lane_capacity)
+    specs = iter(specs)
+    spec = next(specs, None)
+    while spec is not None:
+        simulation.arrive(spec)
+        spec = next(specs, None)
+        if spec is not None:
+            yield from simulation.run_until(int(spec.starts.min()) - 1)
+    yield from simulation.run_until()
+    if simulation.buffer.rows:
+        yield simulation.buffer.flush()
@@ -0,0 +1,132 @@
+"""Batched editing of activities and variants as tables.
+
+The app shows activities and variants as editable tables inside forms; nothing
+is applied while typing. On submit, the edited rows are compared with the
+current state by their '#' column (the activity ID or the variant's index when
+the table was drawn, empty for added rows) and applied as one diff.
+"""
+from generator import is_anomaly, route_number
+
+ACTIVITY_FIELDS = ('name', 'min_time', 'max_time', 'concurrent', 'pool', 'lane')
+ACTIVITY_DEFAULTS = {'min_time': 1, 'max_time': 5, 'concurrent': False, 'pool': '', 'lane': ''}  # as add_activity
+PATH_SEPARATOR = ' → '
+
+
+# --- Activities ---
+def activity_table(registry):
+    return [
+        {'#': activity_id, **{field: activity.get(field) for field in ACTIVITY_FIELDS}}
+        for activity_id, activity in registry.activities.items()
+    ]
+
+
+def _blank(value):
+    return value is None or value != value or value == ''  # None, NaN or an emptied cell
+
+
+def activity_values(row):
+    # Field values of a table row, blank cells filled with the defaults of a new activity
+    values = {field: (ACTIVITY_DEFAULTS[field] if _blank(row.get(field)) else row.get(field)) for field in ACTIVITY_DEFAULTS}
+    values['name'] = '' if _blank(row.get('name')) else str(row['name']).strip()
+    try:
+        values['min_time'], values['max_time'] = int(values['min_time']), int(values['max_time'])
+    except (TypeError, ValueError):
+        raise ValueError(f"{values['name']}: Min and Max Time have to be whole numbers of seconds.") from None
+    if values['min_time'] < 1:
+        raise ValueError(f"{values['name']}: Min Time has to be at least 1 second.")
+    if values['min_time'] > values['max_time']:
+        raise ValueError(f"{values['name']}: Min Time ({values['min_time']}) is greater than Max Time ({values['max_time']}).")
+    values['concurrent'] = bool(values['concurrent'])
+    values['pool'], values['lane'] = str(values['pool']), str(values['lane'])
+    return values
+
+
+def apply_activity_table(registry, rows):
+    """Apply edited activity rows to the registry; returns a change summary.
+
+    All rows are checked first, so an invalid row raises ValueError before
+    anything is applied. Variants reference activities by ID, so renames do
+    not touch them.
+    """
+    edits = []
+    for row in rows:
+        values = activity_values(row)
+        if values['name']:
+            edits.append((row.get('#'), values))
+        elif not _blank(row.get('#')):
+            # Only added rows may stay empty; a cleared name would delete the activity
+            raise ValueError("Activity names cannot be empty; delete the row to remove an activity.")
+
+    seen = set()
+    added = changed = renamed = 0
+    for activity_id, values in edits:
+        if _blank(activity_id):  # new row
+            seen.add(registry.add({**values, 'resource': '', 'anomaly_possible': False}))
+            added += 1
+            continue
+        activity_id = int(activity_id)
+        seen.add(activity_id)
+        activity = registry.activities[activity_id]
+        if any(activity.get(field) != values[field] for field in ACTIVITY_FIELDS):
+            changed += 1
+        if activity['name'] != values['name']:
+            registry.rename(activity_id, values.pop('name'))
+            renamed += 1
+        activity.update(values)
+
+    removed = [activity_id for activity_id in registry.activities if activity_id not in seen]
+    for activity_id in removed:
+        registry.remove(activity_id)
+    return {'added': added, 'changed': changed, 'renamed': renamed, 'removed': len(removed)}
+
+
+# --- Variants ---
+def variant_table(variants, registry):
+    return [
+        {'#': i, 'name': variant['name'], 'route': route_number(variant), 'anomaly': is_anomaly(variant),
+         'activities': PATH_SEPARATOR.join(
+             registry.name_of(activity_id) for activity_id in variant['activity_ids'] if activity_id in registry
+         )}
+        for i, variant in enumerate(variants)
+    ]
+
+
+def apply_variant_table(variants, rows, registry):
+    """Apply edited variant rows; returns the new variant list, a change summary and
+    the activity names that are not defined, with the closest defined name if any."""
+    kept, unknown = [], {}
+    added = changed = 0
+    for row in rows:
+        index = row.get('#')
+        name = (row.get('name') or '').strip()
+        path = [act.strip() for act in (row.get('activities') or '').split(PATH_SEPARATOR.strip()) if act.strip()]
+        if not name and not path:
+            continue
+        route = row.get('route')
+        route = None if route is None or route != route else int(route)
+        anomaly = bool(row.get('anomaly'))
+        ids, missing = registry.resolve(path)
+        for act in missing:
+            unknown.setdefault(act, registry.suggest(act))
+        if index is None or index != index:
+            kept.append({
+                'name': name, 'route': route, 'anomaly': anomaly, 'activity_ids': ids,
+                'frequency': 0, 'times': registry.default_times(),
+            })
+            added += 1
+            continue
+        variant = dict(variants[int(index)])
+        if (variant['name'], route_number(variant), is_anomaly(variant), variant['activity_ids']) != (name, route, anomaly, ids):
+            changed += 1
+            if variant['activity_ids'] != ids:
+                variant.pop('parallel', None)  # blocks refer to the old activity order
+        variant.update(name=name, route=route, anomaly=anomaly, activity_ids=ids)
+        variant['times'] = {**registry.default_times(), **variant['times']}
+        kept.append(variant)
+    removed = len(variants) - (len(kept) - added)
+    return kept, {'added': added, 'changed': changed, 'removed': removed}, unknown
+
+
+def describe_changes(summary):
+    parts = [f"{count} {what}" for what, count in summary.items() if count]
+    return ", ".join(parts) if parts else "no changes"
@@ -0,0 +1,655 @@
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from arrivals import ArrivalScheduler
+from batching import release_time
+
+CASE_PREFIX = "R"
+COLLECTIVE_SHIPMENT = "Create collective shipment order and send to TM"
+CHUNK_SIZE = 10_000
+COLUMNS = ['Case ID', 'Activity', 'Timestamp', 'Pool', 'Lane', 'Route', 'Anomaly']
+LIFECYCLE_MODES = ('end', 'pairs')  # end timestamp column, or start/complete events
+LIFECYCLE_TRANSITIONS = np.array(['start', 'complete'], dtype=object)
+ENGINES = ('vectorized', 'des')  # case-by-case chunks, or time-ordered discrete-event simulation
+ROUTE_PATTERN = re.compile(r'\bRoute (\d+)\b')
+
+
+def output_columns(lifecycle=None):
+    if lifecycle == 'end':
+        return COLUMNS + ['End Timestamp']
+    if lifecycle == 'pairs':
+        return COLUMNS + ['Lifecycle']
+    return COLUMNS
+
+
+# --- Variant Helpers ---
+def route_number(variant):
+    # Explicit 'route' key, else from the name: "Route 3: (Error) ..." -> 3; None without a route
+    if variant.get('route') is not None:
+        return int(variant['route'])
+    match = ROUTE_PATTERN.search(variant['name'])
+    return int(match.group(1)) if match else None
+
+
+def is_anomaly(variant):
+    # Explicit 'anomaly' flag, else "(Error)" in the name
+    if variant.get('anomaly') is not None:
+        return bool(variant['anomaly'])
+    return "(Error)" in variant['name']
+
+
+def route_index(variants):
+    # route -> its variants, resolved once so that "Route 1" does not also match "Route 10"
+    index = {}
+    for variant in variants:
+        route = route_number(variant)
+        if route is not None:
+            index.setdefault(route, []).append(variant)
+    return index
+
+
+def activity_time_range(variant, activity_info, act):
+    # Per-variant override first, then the activity defaults
+    if act in variant['times']:
+        act_time_range = variant['times'][act]
+        return act_time_range.get('min', 60), act_time_range.get('max', 300)
+    return activity_info.get('min_time', 60), activity_info.get('max_time', 300)
+
+
+# --- Case Distribution ---
+def build_variant_weights(variants, route_distribution, rng):
+    # ROUTE_DISTRIBUTION as relative weights per variant of the route
+    index = route_index(variants)
+    pool_variants, weights = [], []
+    for route, weight in route_distribution.items():
+        matching_variants = index.get(route, [])
+        error_variants = [v for v in matching_variants if is_anomaly(v)]
+
+        # Normal cases based on ROUTE_DISTRIBUTION
+        for variant in matching_variants:
+            pool_variants.append(variant)
+            weights.append(weight)
+
+        # Plus ONE error case if it exists
+        if error_variants:
+            pool_variants.append(error_variants[rng.integers(len(error_variants))])
+            weights.append(1)
+    return pool_variants, weights
+
+
+def expected_variant_weights(variants, route_distribution):
+    # Weight per variant as build_variant_weights gives it on average: its route's weight,
+    # plus an equal share of the one extra case the route's error variants draw for
+    index = route_index(variants)
+    weights = {}
+    for route, weight in route_distribution.items():
+        matching_variants = index.get(route, [])
+        error_share = 1 / max(1, sum(is_anomaly(v) for v in matching_variants))
+        for variant in matching_variants:
+            weights[id(variant)] = weights.get(id(variant), 0) + weight + (error_share if is_anomaly(variant) else 0)
+    return [weights.get(id(variant), 0) for variant in variants]
+
+
+def default_case_count(variants, route_distribution):
+    # Cases generate_chunks simulates without num_cases: the total weight of the variant pool
+    return round(sum(expected_variant_weights(variants, route_distribution)))
+
+
+def apportion(weights, num_cases):
+    # Split num_cases proportionally to the weights (largest remainder)
+    weights = np.asarray(weights, dtype=np.float64)
+    if (weights < 0).any():
+        raise ValueError("Route weights in ROUTE_DISTRIBUTION must not be negative.")
+    if not weights.sum() > 0:
+        raise ValueError("The routes in ROUTE_DISTRIBUTION that match a variant need a positive total weight.")
+    exact = weights * (num_cases / weights.sum())
+    counts = np.floor(exact).astype(np.int64)
+    leftover = num_cases - int(counts.sum())
+    if leftover:
+        counts[np.argsort(counts - exact, kind='stable')[:leftover]] += 1
+    return counts
+
+
+def iter_variant_chunks(counts, rng, chunk_size=CHUNK_SIZE):
+    # Lazily shuffled pool: each chunk draws its cases per variant without replacement
+    # from what is left; the order within the chunk is shuffled when it is simulated
+    remaining = np.array(counts, dtype=np.int64)
+    left = int(remaining.sum())
+    while left:
+        size = min(chunk_size, left)
+        drawn = rng.multivariate_hypergeometric(remaining, size)
+        remaining -= drawn
+        left -= size
+        yield drawn
+
+
+# --- Compiled Variant Plans ---
+@dataclass
+class Catalog:
+    # Name tables that event columns index into
+    activity_names: list
+    pool_names: list
+    lane_names: list
+    activity_pool: np.ndarray  # pool code per activity code
+    activity_lane: np.ndarray  # lane code per activity code
+
+
+@dataclass
+class VariantPlan:
+    # Everything the simulation needs per variant, built once per run
+    activities: np.ndarray   # activity codes in path order
+    min_times: np.ndarray
+    max_times: np.ndarray
+    concurrent: np.ndarray   # bool, activity does not advance the clock
+    pool: np.ndarray         # pool codes per path position
+    lane: np.ndarray         # lane codes per path position
+    release_positions: tuple # path positions of the collective activity
+    blocks: tuple            # AND-split/join blocks: per block its branches as path positions
+    route: int
+    anomaly: bool
+
+    def __len__(self):
+        return len(self.activities)
+
+
+def _codes(names):
+    return {name: code for code, name in enumerate(names)}
+
+
+def _groups(values):
+    # (value, indices in original order) for every distinct value, one argsort per call
+    order = np.argsort(values, kind='stable')
+    distinct, firsts = np.unique(values[order], return_index=True)
+    return zip(distinct.tolist(), np.split(order, firsts[1:]))
+
+
+def parallel_blocks(variant):
+    # variant['parallel'] lists AND-blocks as branches of activity names; each block
+    # has to appear as consecutive activities of the variant, branch after branch
+    acts = variant['activities']
+    blocks, searched = [], 0
+    for branches in variant.get('parallel', []):
+        if len(branches) < 2 or not all(branches):
+            raise ValueError(f"{variant['name']}: a parallel block needs at least two non-empty branches.")
+        flat = [act for branch in branches for act in branch]
+        start = next((i for i in range(searched, len(acts) - len(flat) + 1) if acts[i:i + len(flat)] == flat), None)
+        if start is None:
+            raise ValueError(f"{variant['name']}: parallel block {branches} does not match its activities.")
+        block = []
+        for branch in branches:
+            block.append(tuple(range(start, start + len(branch))))
+            start += len(branch)
+        blocks.append(tuple(block))
+        searched = start
+    return tuple(blocks)
+
+
+def build_catalog(activities, used_names):
+    # Catalog of all defined and used activities, plus the activity dict per code
+    activity_lookup = {a['name']: a for a in activities}
+    activity_names = list(dict.fromkeys([a['name'] for a in activities] + list(used_names)))
+    infos = [activity_lookup.get(act, {}) for act in activity_names]
+    pool_names = list(dict.fromkeys(info.get('pool', 'N/A') for info in infos))
+    lane_names = list(dict.fromkeys(info.get('lane', 'N/A') for info in infos))
+    pool_codes, lane_codes = _codes(pool_names), _codes(lane_names)
+    catalog = Catalog(
+        activity_names=activity_names,
+        pool_names=pool_names,
+        lane_names=lane_names,
+        activity_pool=np.array([pool_codes[info.get('pool', 'N/A')] for info in infos], dtype=np.int32),
+        activity_lane=np.array([lane_codes[info.get('lane', 'N/A')] for info in infos], dtype=np.int32),
+    )
+    return catalog, infos
+
+
+def compile_plans(activities, variants, collective_activity=None):
+    """Turn activity dicts and variants into a Catalog and one VariantPlan per variant."""
+    activity_lookup = {a['name']: a for a in activities}
+    catalog, infos = build_catalog(activities, (act for v in variants for act in v['activities']))
+    activity_codes = _codes(catalog.activity_names)
+    activity_concurrent = np.array([info.get('concurrent', False) for info in infos], dtype=bool)
+
+    plans = []
+    for variant in variants:
+        acts = variant['activities']
+        codes = np.array([activity_codes[act] for act in acts], dtype=np.int32)
+        release_positions = tuple(i for i, act in enumerate(acts) if act == collective_activity)
+        blocks = parallel_blocks(variant)
+        if any(branches[0][0] <= i <= branches[-1][-1] for branches in blocks for i in release_positions):
+            raise ValueError(f"{variant['name']}: the collective activity cannot be part of a parallel block.")
+        time_ranges = np.array(
+            [activity_time_range(variant, activity_lookup.get(act, {}), act) for act in acts], dtype=np.int64
+        ).reshape(-1, 2)
+        plans.append(VariantPlan(
+            activities=codes,
+            min_times=time_ranges[:, 0],
+            max_times=time_ranges[:, 1],
+            concurrent=activity_concurrent[codes],
+            pool=catalog.activity_pool[codes],
+            lane=catalog.activity_lane[codes],
+            release_positions=release_positions,
+            blocks=blocks,
+            route=route_number(variant),
+            anomaly=is_anomaly(variant),
+        ))
+    return catalog, plans
+
+
+# --- Event Chunks ---
+@lru_cache(maxsize=1)
+def _time_of_day_labels():
+    return np.array(
+        [f"{h:02d}:{m:02d}:{s:02d}" for h in range(24) for m in range(60) for s in range(60)], dtype=object
+    )
+
+
+def _labels(names, quote):
+    return np.array([quote(name) for name in names], dtype=object)
+
+
+def format_times(times, separator=' '):
+    # "YYYY-MM-DD HH:MM:SS" from a label per distinct day plus the time-of-day table
+    days, seconds = np.divmod(times, 86400)
+    distinct_days, day_index = np.unique(days, return_inverse=True)
+    day_labels = np.array(
+        [day + separator for day in np.datetime_as_string(distinct_days.astype('datetime64[D]')).tolist()],
+        dtype=object
+    )
+    return day_labels[day_index] + _time_of_day_labels()[seconds]
+
+
+@dataclass
+class EventChunk:
+    # Column arrays for one chunk of cases, events in case order (unless reordered by take)
+    route: np.ndarray      # route number per event
+    case_num: np.ndarray   # running case number within the route
+    anomaly: np.ndarray    # bool, case belongs to an error variant
+    activity: np.ndarray   # index into catalog.activity_names
+    timestamp: np.ndarray  # int64 epoch seconds (naive local time)
+    duration: np.ndarray   # service time in seconds, the activity completes at timestamp + duration
+    pool: np.ndarray       # index into catalog.pool_names
+    lane: np.ndarray       # index into catalog.lane_names
+    catalog: Catalog
+    transition: np.ndarray = None  # index into LIFECYCLE_TRANSITIONS once expanded by lifecycle_pairs
+
+    EVENT_FIELDS = ('route', 'case_num', 'anomaly', 'activity', 'timestamp', 'duration', 'pool', 'lane')
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def fields(self):
+        # Column names that hold event values, with the transitions of expanded chunks
+        return self.EVENT_FIELDS + (('transition',) if self.transition is not None else ())
+
+    def take(self, index):
+        # Events at the given positions, e.g. an argsort of the timestamps
+        return EventChunk(**{name: getattr(self, name)[index] for name in self.fields()}, catalog=self.catalog)
+
+    def sorted_by_time(self):
+        # Chronological order on the integer timestamps; ties keep case order
+        return self.take(np.argsort(self.timestamp, kind='stable'))
+
+    @classmethod
+    def concat(cls, chunks):
+        chunks = list(chunks)
+        return cls(
+            **{name: np.concatenate([getattr(c, name) for c in chunks]) for name in chunks[0].fields()},
+            catalog=chunks[0].catalog,
+        )
+
+    def case_starts(self):
+        # Index of the first event of every run of events of the same case
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(np.r_[True, (np.diff(self.route) != 0) | (np.diff(self.case_num) != 0)])
+
+    def case_ids(self, per_case=False):
+        # Formatted once per case, then repeated for its events
+        firsts = self.case_starts()
+        case_ids = np.array([
+            f"{CASE_PREFIX}{route}_{str(num).zfill(2)}" + ("E" if anomaly else "")
+            for route, num, anomaly in zip(
+                self.route[firsts].tolist(), self.case_num[firsts].tolist(), self.anomaly[firsts].tolist()
+            )
+        ], dtype=object)
+        if per_case:
+            return case_ids
+        return np.repeat(case_ids, np.diff(np.r_[firsts, len(self)]))
+
+    def lifecycle_pairs(self):
+        # Start and complete event of every activity next to each other; an expanded chunk
+        # (e.g. one sorted by time after the expansion) is returned as it is
+        if self.transition is not None:
+            return self
+        pairs = self.take(np.repeat(np.arange(len(self)), 2))
+        pairs.timestamp = np.column_stack([self.timestamp, self.timestamp + self.duration]).ravel()
+        pairs.transition = np.tile(np.arange(len(LIFECYCLE_TRANSITIONS), dtype=np.int8), len(self))
+        return pairs
+
+    def formatted_timestamps(self, separator=' '):
+        return format_times(self.timestamp, separator)
+
+    def columns(self, quote=str, format_timestamps=True, lifecycle=None):
+        # Output values per column, in output_columns(lifecycle) order; quote is applied to the
+        # name tables only. Without format_timestamps the time columns hold the epoch seconds.
+        chunk = self.lifecycle_pairs() if lifecycle == 'pairs' else self
+        routes, route_index = np.unique(chunk.route, return_inverse=True)
+        route_labels = np.array([quote(f"Route {route}") for route in routes.tolist()], dtype=object)
+        times = [chunk.timestamp]
+        if lifecycle == 'end':
+            times.append(chunk.timestamp + chunk.duration)
+        if format_timestamps:
+            times = [format_times(t) for t in times]
+        columns = [
+            chunk.case_ids(),
+            _labels(chunk.catalog.activity_names, quote)[chunk.activity],
+            times[0],
+            _labels(chunk.catalog.pool_names, quote)[chunk.pool],
+            _labels(chunk.catalog.lane_names, quote)[chunk.lane],
+            route_labels[route_index],
+            np.where(chunk.anomaly, 'Yes', 'No'),
+        ]
+        if lifecycle == 'end':
+            columns.append(times[1])
+        elif lifecycle == 'pairs':
+            columns.append(LIFECYCLE_TRANSITIONS[chunk.transition])
+        return [column.tolist() for column in columns]
+
+    def records(self, lifecycle=None):
+        # One dict per event, as written to the event log
+        names = output_columns(lifecycle)
+        for row in zip(*self.columns(lifecycle=lifecycle)):
+            yield dict(zip(names, row))
+
+
+def plan_durations(rng, plan, size):
+    # (cases x activities) random durations with jitter, at least one second; collective
+    # shipments take no time, their successors start at the release (drawn all the same,
+    # so the random streams do not depend on them)
+    shape = (size, len(plan))
+    durations = rng.integers(plan.min_times, plan.max_times + 1, size=shape) + rng.integers(-4, 5, size=shape)
+    np.maximum(durations, 1, out=durations)
+    durations[:, list(plan.release_positions)] = 0
+    return durations
+
+
+def simulate_plan(rng, plan, starts):
+    # (cases x activities) timestamps and durations for all cases of one variant
+    # Non-concurrent activities advance the clock for the next one
+    durations = plan_durations(rng, plan, len(starts))
+    steps = np.where(plan.concurrent, 0, durations)
+
+    # Branches of a parallel block run from the same start; the block advances the
+    # clock by its longest branch (row-wise max over the branch sums)
+    clock, offsets = steps, None
+    if plan.blocks:
+        clock, offsets = steps.copy(), np.zeros_like(steps)
+        for branches in plan.blocks:
+            ends = []
+            for branch in branches:
+                branch_steps = steps[:, branch]
+                within = np.cumsum(branch_steps, axis=1)
+                offsets[:, branch] = within - branch_steps
+                ends.append(within[:, -1])
+            first, last = branches[0][0], branches[-1][-1]
+            clock[:, first:last] = 0
+            clock[:, last] = np.max(ends, axis=0)
+
+    timestamps = np.empty(steps.shape, dtype=np.int64)
+    timestamps[:, 0] = starts
+    np.cumsum(clock[:, :-1], axis=1, out=timestamps[:, 1:])
+    timestamps[:, 1:] += starts[:, None]
+    if offsets is not None:
+        timestamps += offsets
+
+    # Collective shipments wait for their (hour, route) batch: every case of the route that
+    # is ready within the same hour leaves at the next full hour, later activities start there
+    for position in plan.release_positions:
+        release = release_time(timestamps[:, position])
+        timestamps[:, position:] += (release - timestamps[:, position])[:, None]
+    return timestamps, durations
+
+
+# --- Chunk Simulation ---
+@dataclass
+class RunContext:
+    # Everything a (possibly remote) worker needs to simulate any chunk of a run
+    catalog: Catalog
+    plans: list
+    seed: np.random.SeedSequence
+    model: object = None  # ProcessModel that replaces the variant plans (see process_model.py)
+
+
+@dataclass
+class ChunkSpec:
+    # One shard of the case range, fixed by the parent before simulation
+    index: int
+    counts: np.ndarray   # cases per pool variant
+    case_base: dict      # route -> cases of that route in earlier chunks
+    starts: np.ndarray   # case start times in case order (epoch seconds)
+
+
+def _stream(root, *key):
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + key)
+
+
+def chunk_seed(root, index):
+    # Independent stream per chunk, the same whichever process simulates it
+    return _stream(root, 1, index)
+
+
+def chunk_cases(context, spec, rng):
+    # Variant, route and case number of every case of the chunk, in case order
+    chunk = rng.permutation(np.repeat(np.arange(len(spec.counts)), spec.counts))
+
+    # Case numbers continue per route across chunks
+    variant_routes = np.array([plan.route for plan in context.plans], dtype=np.int64)
+    case_routes = variant_routes[chunk]
+    case_nums = np.empty(len(chunk), dtype=np.int64)
+    for route, cases in _groups(case_routes):
+        case_nums[cases] = np.arange(1, len(cases) + 1) + spec.case_base[route]
+    return chunk, case_routes, case_nums
+
+
+def simulate_chunk(context, spec):
+    if context.model is not None:
+        return context.model.simulate_chunk(context, spec)
+    rng = np.random.default_rng(chunk_seed(context.seed, spec.index))
+    plans = context.plans
+    chunk, case_routes, case_nums = chunk_cases(context, spec, rng)
+    size = len(chunk)
+
+    # Event offsets of every case within the chunk
+    variant_lengths = np.array([len(plan) for plan in plans], dtype=np.int64)
+    lengths = variant_lengths[chunk]
+    offsets = np.zeros(size, dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    total = int(lengths.sum())
+    timestamp = np.empty(total, dtype=np.int64)
+    duration = np.empty(total, dtype=np.int64)
+    activity = np.empty(total, dtype=np.int32)
+    pool = np.empty(total, dtype=np.int32)
+    lane = np.empty(total, dtype=np.int32)
+
+    for variant_index, cases in _groups(chunk):
+        plan = plans[variant_index]
+        if not len(plan):
+            continue
+        positions = offsets[cases][:, None] + np.arange(len(plan))
+        timestamp[positions], duration[positions] = simulate_plan(rng, plan, spec.starts[cases])
+        activity[positions] = plan.activities
+        pool[positions] = plan.pool
+        lane[positions] = plan.lane
+
+    variant_anomaly = np.array([plan.anomaly for plan in plans], dtype=bool)
+    return EventChunk(
+        route=np.repeat(case_routes, lengths),
+        case_num=np.repeat(case_nums, lengths),
+        anomaly=np.repeat(variant_anomaly[chunk], lengths),
+        activity=activity,
+        timestamp=timestamp,
+        duration=duration,
+        pool=pool,
+        lane=lane,
+        catalog=context.catalog,
+    )
+
+
+def _chunk_specs(counts, variant_routes, rng, scheduler, arrival_rng, chunk_size):
+    route_case_counter = {route: 0 for route in variant_routes}
+    for index, drawn in enumerate(iter_variant_chunks(counts, rng, chunk_size)):
+        starts = scheduler.draw(arrival_rng, int(drawn.sum()))
+        yield ChunkSpec(index=index, counts=drawn, case_base=dict(route_case_counter), starts=starts)
+        for route, count in zip(variant_routes, drawn.tolist()):
+            route_case_counter[route] += count
+
+
+# --- Parallel Workers ---
+_worker_context = None
+
+
+def _init_worker(context):
+    global _worker_context
+    _worker_context = context
+
+
+def _run_chunk(spec, encode):
+    chunk = simulate_chunk(_worker_context, spec)
+    return encode(chunk) if encode else chunk
+
+
+def _parallel_chunks(context, specs, workers, encode):
+    # Results come back in chunk order; at most two chunks per worker are in flight
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as executor:
+        pending = deque()
+        for spec in specs:
+            pending.append(executor.submit(_run_chunk, spec, encode))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate_chunks(
+    activities,
+    variants,
+    route_distribution,
+    start_date,
+    end_date,
+    min_case_gap=600,
+    max_case_gap=1800,
+    seed=None,
+    start_hours=(7, 8),
+    start_minutes=(0, 0),
+    collective_activity=None,
+    num_cases=None,
+    chunk_size=CHUNK_SIZE,
+    workers=1,
+    encode=None,
+    arrivals='window',
+    hourly_weights=None,
+    engine='vectorized',
+    lane_capacity=None,
+    model=None,
+):
+    """Simulate cases for the given process definition and yield EventChunks.
+
+    Activities and variants use the same shape as the app's DEFAULT_ACTIVITIES /
+    DEFAULT_VARIANTS. A variant belongs to the route in its 'route' key and is an
+    error variant if its 'anomaly' flag is set; without these keys, "Route N" and
+    "(Error)" in its name decide. ROUTE_DISTRIBUTION is used as relative weights
+    for num_cases cases (default: the sum of its weights); the case sequence is
+    drawn lazily in chunks of chunk_size, so memory does not grow with num_cases. If
+    collective_activity is set, that activity is held back and released at the
+    next full hour together with all other cases of the route.
+
+    Case start times come from an ArrivalScheduler (arrivals: 'window', 'gaps',
+    'poisson' or 'weighted', see arrivals.py), which checks up front that the
+    cases fit into the date window.
+
+    With workers > 1, chunks are simulated in a process pool. Every chunk has its
+    own random stream derived from seed, so the output for a given seed and
+    chunk_size does not depend on the number of workers. encode (a module-level
+    function) is applied to each chunk in the worker and its result is yielded
+    instead of the chunk.
+
+    engine='des' runs the discrete-event simulation in des.py instead: the same
+    events, yielded in timestamp order rather than case by case (in a single
+    process; workers is ignored). It takes arrivals in time order, so 'window'
+    starts are then drawn ascending across chunks. Only this engine models resources: lane_capacity
+    maps lane names to a number of workers, activities of such a lane queue for
+    a free worker.
+
+    model (a PROCESS_MODEL dict, see process_model.py) replaces variants and
+    route_distribution: every case is a random walk over the model's weighted
+    transitions. num_cases is required then.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown simulation engine: {engine}")
+    if chunk_size < 1:
+        raise ValueError("The chunk size has to be at least one case.")
+    if num_cases is not None and num_cases < 0:
+        raise ValueError("The number of cases must not be negative.")
+    if lane_capacity and engine != 'des':
+        raise ValueError("Lane capacities need the discrete-event engine (engine='des').")
+    if model is not None:
+        if engine == 'des':
+            raise ValueError("The discrete-event engine simulates variants; use engine='vectorized' with a process model.")
+        if num_cases is None:
+            raise ValueError("Please set the number of cases to simulate from a process model.")
+    elif not activities or not variants:
+        raise ValueError("Please add at least one activity and one variant before generating the event log.")
+
+    root = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(_stream(root, 0))  # variant pool and chunk composition
+    arrival_rng = np.random.default_rng(_stream(root, 2))
+    if model is None:
+        pool_variants, weights = build_variant_weights(variants, route_distribution, rng)
+        if not pool_variants:
+            raise ValueError("No variant matches a route in ROUTE_DISTRIBUTION.")
+        if num_cases is None:
+            num_cases = sum(weights)
+    scheduler = ArrivalScheduler(
+        arrivals, start_date, end_date, num_cases,
+        start_hours=start_hours,
+        start_minutes=start_minutes,
+        min_case_gap=min_case_gap,
+        max_case_gap=max_case_gap,
+        hourly_weights=hourly_weights,
+        ascending=engine == 'des',  # the discrete-event engine takes arrivals in time order
+    )
+
+    if model is None:
+        counts = apportion(weights, num_cases)
+        catalog, plans = compile_plans(activities, pool_variants, collective_activity)
+        context = RunContext(catalog=catalog, plans=plans, seed=root)
+        routes = [plan.route for plan in plans]
+    else:
+        from process_model import compile_model
+        catalog, process_model = compile_model(activities, model, collective_activity)
+        context = RunContext(catalog=catalog, plans=[], seed=root, model=process_model)
+        counts, routes = np.array([num_cases], dtype=np.int64), [process_model.route]
+    specs = _chunk_specs(counts, routes, rng, scheduler, arrival_rng, chunk_size)
+
+    if engine == 'des':
+        from des import simulate_events
+        for chunk in simulate_events(context, specs, lane_capacity=lane_capacity):
+            yield encode(chunk) if encode else chunk
+        return
+    if workers > 1:
+        yield from _parallel_chunks(context, specs, workers, encode)
+        return
+    for spec in specs:
+        chunk = simulate_chunk(context, spec)
+        yield encode(chunk) if encode else chunk
+
+
+def generate_events(*args, **kwargs):
+    # Same arguments as generate_chunks, one dict per event
+    for chunk in generate_chunks(*args, **kwargs):
+        yield from chunk.records()
@@ -1,7 +1,21 @@
+from collections import Counter
+from functools import lru_cache
+
 import graphviz
 
+from generator import parallel_blocks
+
+FLOW_CACHE_SIZE = 64  # rendered variant diagrams kept across Streamlit reruns
+
+def _blocks_by_start(variant_name, activities, parallel):
+    # first position -> (block number, branches as activity positions), matched by the
+    # generator, so a block it would reject raises ValueError here as well
+    variant = {'name': variant_name, 'activities': list(activities), 'parallel': parallel}
+    return {branches[0][0]: (b_index, branches) for b_index, branches in enumerate(parallel_blocks(variant))}
+
+
 # Graphviz Process Flow Visualization
-def visualize_variant_flow(variant_name, activities):
+def visualize_variant_flow(variant_name, activities, parallel=()):
     flow = graphviz.Digraph(comment=f'Process Flow for {variant_name}')
     flow.attr(rankdir='LR', size='10')
 
@@ -15,10 +29,119 @@ def visualize_variant_flow(variant_name, activities):
     # End Node
     flow.node('end', 'End', shape='ellipse')
 
-    # Connect Nodes Sequentially
-    flow.edge('start', activities[0])  # Connect start to first activity
-    for i in range(len(activities) - 1):
-        flow.edge(activities[i], activities[i + 1])  # Sequential edges
-    flow.edge(activities[-1], 'end')  # Connect last activity to end
+    # Parallel blocks (AND-split/AND-join) by their first activity position
+    blocks = _blocks_by_start(variant_name, activities, parallel)
+
+    # Connect Nodes Sequentially, forking and joining around parallel blocks
+    previous = 'start'
+    i = 0
+    while i < len(activities):
+        if i in blocks:
+            b_index, branches = blocks[i]
+            split, join = f'and_split_{b_index}', f'and_join_{b_index}'
+            flow.node(split, '+', shape='diamond')
+            flow.node(join, '+', shape='diamond')
+            flow.edge(previous, split)
+            for branch in branches:
+                flow.edge(split, activities[branch[0]])
+                for a, b in zip(branch, branch[1:]):
+                    flow.edge(activities[a], activities[b])
+                flow.edge(activities[branch[-1]], join)
+            previous = join
+            i = branches[-1][-1] + 1
+        else:
+            flow.edge(previous, activities[i])
+            previous = activities[i]
+            i += 1
+    flow.edge(previous, 'end')  # Connect last activity to end
+
+    return flow
+
+
+@lru_cache(maxsize=FLOW_CACHE_SIZE)
+def _flow_source(variant_name, activities, parallel):
+    return visualize_variant_flow(variant_name, list(activities), parallel).source
+
+
+def cached_variant_flow(variant_name, activities, parallel=()):
+    # DOT source of the variant diagram, built once per (name, activities, parallel blocks)
+    blocks = tuple(tuple(tuple(branch) for branch in branches) for branches in parallel)
+    return _flow_source(variant_name, tuple(activities), blocks)
+
+
+# Merged Directly-Follows Graph over all Variants
+def variant_edges(activities, parallel=(), variant_name=''):
+    # (from, to) -> count for one variant; parallel branches fork from the activity
+    # before their block and join into the one after it
+    edges = Counter()
+    activities = list(activities)
+    blocks = _blocks_by_start(variant_name, activities, parallel)
+
+    previous = ['start']
+    i = 0
+    while i < len(activities):
+        if i in blocks:
+            _, branches = blocks[i]
+            for branch in branches:
+                names = [activities[position] for position in branch]
+                edges.update((p, names[0]) for p in previous)
+                edges.update(zip(names, names[1:]))
+            previous = [activities[branch[-1]] for branch in branches]
+            i = branches[-1][-1] + 1
+        else:
+            edges.update((p, activities[i]) for p in previous)
+            previous = [activities[i]]
+            i += 1
+    if activities:
+        edges.update((p, 'end') for p in previous)
+    return edges
+
+
+class DirectlyFollowsGraph:
+    """Directly-follows edges of all variants, weighted by variant frequency.
+
+    Each variant's weighted edges are kept, so update() only swaps the contribution
+    of a variant that changed. Repeated activities share one node and form cycles.
+    """
+
+    def __init__(self):
+        self.edges = Counter()
+        self.contributions = {}  # variant key -> (signature, weighted edges)
+
+    def update(self, key, activities, weight, parallel=(), variant_name=''):
+        # Raises ValueError for parallel blocks that do not match, leaving the graph as it was
+        signature = (tuple(activities), weight, tuple(tuple(tuple(b) for b in block) for block in parallel))
+        current = self.contributions.get(key)
+        if current and current[0] == signature:
+            return False
+        edges = variant_edges(activities, parallel, variant_name)
+        contribution = Counter({edge: count * weight for edge, count in edges.items()})
+        if current:
+            self.edges.subtract(current[1])
+        self.edges.update(contribution)
+        self.contributions[key] = (signature, contribution)
+        self._prune()
+        return True
+
+    def retain(self, keys):
+        # Forget variants that no longer exist
+        for key in set(self.contributions) - set(keys):
+            self.edges.subtract(self.contributions.pop(key)[1])
+        self._prune()
+
+    def _prune(self):
+        # Drop edges no variant uses any more (frequencies are floats, so allow for rounding)
+        self.edges = Counter({edge: weight for edge, weight in self.edges.items() if weight > 1e-9})
 
-    return flow
\ No newline at end of file
+    def to_graphviz(self):
+        flow = graphviz.Digraph(comment='Merged Process Model')
+        flow.attr(rankdir='LR', size='14')
+        flow.node('start', 'Start', shape='ellipse')
+        flow.node('end', 'End', shape='ellipse')
+        activities = dict.fromkeys(act for edge in self.edges for act in edge if act not in ('start', 'end'))
+        for act in activities:
+            flow.node(act, act, shape='box')
+        heaviest = max(self.edges.values(), default=1)
+        for (source, target), weight in self.edges.items():
+            flow.edge(source, target, label=f"{weight:g}", penwidth=f"{1 + 4 * weight / heaviest:.2f}")
+        return flow
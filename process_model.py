@@ -0,0 +1,220 @@
+"""Graph-based process model as an alternative to enumerated variants.
+
+A model gives start weights and, per activity, weighted successors; "END" ends
+the case. Loops are bounded by max_visits (how often a case may do the same
+activity), so a model with a few dozen edges yields many distinct variants:
+
+    PROCESS_MODEL = {
+        "start": {"Order request notification": 1},
+        "transitions": {
+            "Order request notification": {"Create order request": 1},
+            "Check Order Legitimacy": {"Send information to distributor": 9,
+                                       "Inform systems about failed legitimacy check": 1},
+            ...
+        },
+        "max_visits": 2,
+        "anomalies": ["Inform systems about failed legitimacy check"],
+    }
+
+Activities without transitions end the case. Cases run as a vectorized random
+walk over the transition tables, one step for all cases of a chunk at a time.
+
+A model has no routes: every case gets the model's "route" (default 0), so the
+Route column is constant, and a case is an anomaly only if it visits one of the
+"anomalies". model_from_variants() merges all routes into one model; it marks
+the activities that only error variants do, which for variants that differ
+from their normal route only by repetitions is none at all.
+"""
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+from batching import release_time
+from generator import (
+    EventChunk, _codes, _groups, activity_time_range, build_catalog, chunk_seed, is_anomaly, route_index
+)
+
+END = "END"
+DEFAULT_MAX_VISITS = 3
+MAX_PATH_LENGTH = 200
+
+
+def _pick(rng, weights):
+    # Row-wise weighted choice; rows without any weight give -1
+    cumulative = np.cumsum(weights, axis=1)
+    total = cumulative[:, -1]
+    choice = (cumulative > (rng.random(len(weights)) * total)[:, None]).argmax(axis=1)
+    return np.where(total > 0, choice, -1)
+
+
+@dataclass
+class ProcessModel:
+    start_codes: np.ndarray   # activity codes a case can start with
+    start_weights: np.ndarray
+    successors: np.ndarray    # (activities x max out-degree) codes, len(activities) = END, -1 = none
+    weights: np.ndarray       # transition weights in the same layout
+    max_visits: int
+    max_length: int
+    route: int
+    anomalous: np.ndarray     # bool per activity code, visiting it flags the case
+    min_times: np.ndarray     # per activity code
+    max_times: np.ndarray
+    concurrent: np.ndarray
+    collective: int           # activity code of the collective shipment, -1 if none
+
+    def walk(self, rng, size):
+        # (cases x max_length) activity codes, -1 after the end of a case, and the path lengths
+        end = len(self.min_times)
+        paths = np.full((size, self.max_length), -1, dtype=np.int32)
+        visits = np.zeros((size, end), dtype=np.int16)
+        rows = np.arange(size)
+        first = self.start_codes[_pick(rng, np.broadcast_to(self.start_weights, (size, len(self.start_weights))))]
+        paths[:, 0] = first
+        visits[rows, first] += 1
+
+        active = rows
+        for step in range(1, self.max_length):
+            successors = self.successors[paths[active, step - 1]]
+            weights = self.weights[paths[active, step - 1]].copy()
+            real = (successors >= 0) & (successors < end)
+            weights[real & (visits[active[:, None], np.where(real, successors, 0)] >= self.max_visits)] = 0
+            choice = _pick(rng, weights)
+            following = np.where(choice >= 0, successors[np.arange(len(active)), choice], end)
+            going = following < end
+            active, following = active[going], following[going]
+            if not len(active):
+                break
+            paths[active, step] = following
+            visits[active, following] += 1
+        return paths, (paths >= 0).sum(axis=1)
+
+    def simulate_paths(self, rng, codes, starts):
+        # Timestamps and durations for (cases x length) paths of the same length
+        durations = rng.integers(self.min_times[codes], self.max_times[codes] + 1) + rng.integers(-4, 5, size=codes.shape)
+        np.maximum(durations, 1, out=durations)
+        durations[codes == self.collective] = 0  # collective shipments take no time, as in plan_durations
+        steps = np.where(self.concurrent[codes], 0, durations)
+        timestamps = np.empty(codes.shape, dtype=np.int64)
+        timestamps[:, 0] = starts
+        np.cumsum(steps[:, :-1], axis=1, out=timestamps[:, 1:])
+        timestamps[:, 1:] += starts[:, None]
+
+        # Collective shipments wait for the next full hour, as in simulate_plan
+        if self.collective >= 0:
+            for position in np.flatnonzero((codes == self.collective).any(axis=0)).tolist():
+                rows = codes[:, position] == self.collective
+                ready = timestamps[rows, position]
+                timestamps[rows, position:] += (release_time(ready) - ready)[:, None]
+        return timestamps, durations
+
+    def simulate_chunk(self, context, spec):
+        rng = np.random.default_rng(chunk_seed(context.seed, spec.index))
+        catalog = context.catalog
+        size = int(spec.counts.sum())
+        paths, lengths = self.walk(rng, size)
+
+        offsets = np.zeros(size, dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        total = int(lengths.sum())
+        timestamp = np.empty(total, dtype=np.int64)
+        duration = np.empty(total, dtype=np.int64)
+        activity = np.empty(total, dtype=np.int32)
+
+        # One vectorized pass per path length, whatever the number of distinct paths
+        for length, cases in _groups(lengths):
+            codes = paths[cases, :length]
+            positions = offsets[cases][:, None] + np.arange(length)
+            timestamp[positions], duration[positions] = self.simulate_paths(rng, codes, spec.starts[cases])
+            activity[positions] = codes
+
+        anomaly = (self.anomalous[np.maximum(paths, 0)] & (paths >= 0)).any(axis=1)
+        case_nums = np.arange(1, size + 1) + spec.case_base[self.route]
+        return EventChunk(
+            route=np.full(total, self.route, dtype=np.int64),
+            case_num=np.repeat(case_nums, lengths),
+            anomaly=np.repeat(anomaly, lengths),
+            activity=activity,
+            timestamp=timestamp,
+            duration=duration,
+            pool=catalog.activity_pool[activity],
+            lane=catalog.activity_lane[activity],
+            catalog=catalog,
+        )
+
+
+def compile_model(activities, model, collective_activity=None):
+    """Turn activity dicts and a PROCESS_MODEL dict into a Catalog and a ProcessModel."""
+    start = model.get('start') or {}
+    if isinstance(start, str):
+        start = {start: 1}
+    transitions = model.get('transitions', {})
+    if not start:
+        raise ValueError("The process model needs at least one start activity.")
+    start_weights = np.array(list(start.values()), dtype=np.float64)
+    if (start_weights < 0).any() or not start_weights.sum() > 0:
+        raise ValueError("Start weights of the process model must not be negative and need a positive sum.")
+    used = list(start) + list(transitions) + [
+        act for successors in transitions.values() for act in successors if act != END
+    ]
+    catalog, infos = build_catalog(activities, used)
+    codes = _codes(catalog.activity_names)
+    end = len(catalog.activity_names)
+
+    rows = [transitions.get(name) or {END: 1} for name in catalog.activity_names]
+    degree = max(len(row) for row in rows)
+    successors = np.full((end, degree), -1, dtype=np.int32)
+    weights = np.zeros((end, degree), dtype=np.float64)
+    for code, row in enumerate(rows):
+        for i, (act, weight) in enumerate(row.items()):
+            if weight < 0:
+                raise ValueError(f"Negative transition weight from {catalog.activity_names[code]} to {act}.")
+            successors[code, i] = end if act == END else codes[act]
+            weights[code, i] = weight
+
+    time_ranges = np.array(
+        [activity_time_range({'times': {}}, info, name) for name, info in zip(catalog.activity_names, infos)],
+        dtype=np.int64
+    )
+    anomalies = set(model.get('anomalies', []))
+    return catalog, ProcessModel(
+        start_codes=np.array([codes[act] for act in start], dtype=np.int32),
+        start_weights=start_weights,
+        successors=successors,
+        weights=weights,
+        max_visits=int(model.get('max_visits', DEFAULT_MAX_VISITS)),
+        max_length=int(model.get('max_length', MAX_PATH_LENGTH)),
+        route=int(model.get('route', 0)),
+        anomalous=np.array([name in anomalies for name in catalog.activity_names], dtype=bool),
+        min_times=time_ranges[:, 0],
+        max_times=time_ranges[:, 1],
+        concurrent=np.array([info.get('concurrent', False) for info in infos], dtype=bool),
+        collective=codes.get(collective_activity, -1),
+    )
+
+
+def model_from_variants(variants, route_distribution):
+    # Weighted directly-follows model of the variants, each weighted by its route;
+    # activities that only occur in error variants mark anomalies
+    start = Counter()
+    transitions = defaultdict(Counter)
+    max_visits = 1
+    normal, errors = set(), set()
+    index = route_index(variants)
+    for route, weight in route_distribution.items():
+        for variant in index.get(route, []):
+            acts = variant['activities']
+            if not acts:
+                continue
+            start[acts[0]] += weight
+            for a, b in zip(acts, acts[1:]):
+                transitions[a][b] += weight
+            transitions[acts[-1]][END] += weight
+            max_visits = max(max_visits, max(Counter(acts).values()))
+            (errors if is_anomaly(variant) else normal).update(acts)
+    return {
+        'start': dict(start),
+        'transitions': {act: dict(successors) for act, successors in transitions.items()},
+        'max_visits': max_visits,
+        'anomalies': sorted(errors - normal),
+    }
@@ -0,0 +1,117 @@
+"""Activity registry for the app's session state.
+
+Activities are kept under stable IDs, with an index from name to ID. Variants
+store the IDs of their activities ('activity_ids') and their time overrides
+keyed by ID, so a rename changes one registry entry and no variant. The
+generator and the diagrams work on names; named_variant() resolves a variant
+for them.
+"""
+import difflib
+
+SUGGESTION_CUTOFF = 0.8  # how close an unknown name has to be to suggest a defined one
+
+
+class ActivityRegistry:
+    def __init__(self, activities=()):
+        self.activities = {}  # ID -> activity dict, in definition order
+        self.index = {}       # name -> ID
+        self.next_id = 0
+        for activity in activities:
+            self.add(activity)
+
+    def __len__(self):
+        return len(self.activities)
+
+    def __contains__(self, activity_id):
+        return activity_id in self.activities
+
+    def _index(self, activity_id):
+        # Clashing names keep the ID indexed first; the app reports them as duplicates
+        name = self.activities[activity_id]['name']
+        if name:
+            self.index.setdefault(name, activity_id)
+
+    def _unindex(self, activity_id):
+        name = self.activities[activity_id]['name']
+        if self.index.get(name) != activity_id:
+            return
+        del self.index[name]
+        # Only a clashing name needs a scan, for the activity that takes over the name
+        for other_id, other in self.activities.items():
+            if other_id != activity_id and other['name'] == name:
+                self.index[name] = other_id
+                break
+
+    def add(self, activity):
+        activity_id = self.next_id
+        self.next_id += 1
+        self.activities[activity_id] = dict(activity)
+        self._index(activity_id)
+        return activity_id
+
+    def remove(self, activity_id):
+        self._unindex(activity_id)
+        del self.activities[activity_id]
+
+    def rename(self, activity_id, name):
+        self._unindex(activity_id)
+        self.activities[activity_id]['name'] = name
+        self._index(activity_id)
+
+    def id_of(self, name):
+        return self.index.get(name)
+
+    def name_of(self, activity_id):
+        return self.activities[activity_id]['name']
+
+    def names(self):
+        return [activity['name'] for activity in self.activities.values()]
+
+    def to_list(self):
+        # Activity dicts as the generator expects them
+        return list(self.activities.values())
+
+    def suggest(self, name):
+        # Closest defined name for an unknown one, e.g. a typo
+        matches = difflib.get_close_matches(name, self.index, n=1, cutoff=SUGGESTION_CUTOFF)
+        return matches[0] if matches else None
+
+    def resolve(self, names):
+        # IDs of the defined names, and the names that are not defined
+        ids, unknown = [], []
+        for name in names:
+            activity_id = self.index.get(name)
+            if activity_id is None:
+                unknown.append(name)
+            else:
+                ids.append(activity_id)
+        return ids, unknown
+
+    def default_times(self):
+        return {
+            activity_id: {'min': activity['min_time'], 'max': activity['max_time']}
+            for activity_id, activity in self.activities.items()
+        }
+
+    def bind_variant(self, variant):
+        # Name-based variant (as in DEFAULT_VARIANTS) -> ID-based variant, plus its unknown names
+        ids, unknown = self.resolve(variant['activities'])
+        bound = {key: value for key, value in variant.items() if key not in ('activities', 'times', 'parallel')}
+        bound['activity_ids'] = ids
+        bound['times'] = {self.index[name]: dict(times) for name, times in variant['times'].items() if name in self.index}
+        if variant.get('parallel'):
+            bound['parallel'] = [[self.resolve(branch)[0] for branch in branches] for branches in variant['parallel']]
+        return bound, unknown
+
+    def named_variant(self, variant):
+        # ID-based variant -> name-based variant; activities removed since are left out
+        activities = self.activities
+        named = {key: value for key, value in variant.items() if key not in ('activity_ids', 'times', 'parallel')}
+        named['activities'] = [activities[i]['name'] for i in variant['activity_ids'] if i in activities]
+        named['times'] = {activities[i]['name']: times for i, times in variant['times'].items() if i in activities}
+        if variant.get('parallel'):
+            named['parallel'] = [
+                [[activities[i]['name'] for i in branch if i in activities] for branch in branches]
+                for branches in variant['parallel']
+            ]
+        return named
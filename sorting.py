@@ -0,0 +1,98 @@
+import heapq
+import os
+import tempfile
+
+import numpy as np
+
+from generator import EventChunk
+
+RUN_EVENTS = 2_000_000  # events sorted in memory per run
+MERGE_BLOCK = 65_536    # events read from each run at a time while merging
+
+
+# --- Sorted Runs ---
+def _save_run(chunks, directory, index):
+    run = EventChunk.concat(chunks).sorted_by_time()
+    paths = {}
+    for name in run.fields():
+        paths[name] = os.path.join(directory, f"run{index}_{name}.npy")
+        np.save(paths[name], getattr(run, name))
+    return paths, run.catalog
+
+
+def write_runs(chunks, directory, run_events=RUN_EVENTS):
+    # Time-sorted runs of about run_events events each, one .npy file per column
+    runs, pending, size = [], [], 0
+    catalog = None
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= run_events:
+            paths, catalog = _save_run(pending, directory, len(runs))
+            runs.append(paths)
+            pending, size = [], 0
+    if pending:
+        paths, catalog = _save_run(pending, directory, len(runs))
+        runs.append(paths)
+    return runs, catalog
+
+
+# --- K-Way Merge ---
+class _Run:
+    # Memory-mapped columns of one sorted run and the block currently being merged
+    def __init__(self, paths, block_size):
+        self.columns = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+        self.size = len(self.columns['timestamp'])
+        self.block_size = block_size
+        self.end = 0
+        self.block = None
+
+    def next_block(self):
+        start, self.end = self.end, min(self.end + self.block_size, self.size)
+        self.block = {name: np.array(column[start:self.end]) for name, column in self.columns.items()}
+        return int(self.block['timestamp'][-1])
+
+    def take(self, count):
+        taken = {name: column[:count] for name, column in self.block.items()}
+        self.block = {name: column[count:] for name, column in self.block.items()}
+        return taken
+
+    @property
+    def exhausted(self):
+        return self.end == self.size
+
+
+def merge_runs(runs, catalog, block_size=MERGE_BLOCK):
+    """Yield EventChunks in timestamp order from sorted runs.
+
+    A heap holds (last timestamp of the loaded block, run) per run. Everything up to
+    the smallest such key is final, so it is emitted from all loaded blocks at once;
+    ties keep run order, which makes the result equal to one stable in-memory sort.
+    """
+    runs = [_Run(paths, block_size) for paths in runs]
+    heap = [(run.next_block(), index) for index, run in enumerate(runs) if run.size]
+    heapq.heapify(heap)
+    while heap:
+        cutoff, top = heapq.heappop(heap)
+        parts = []
+        for index, run in enumerate(runs):
+            if run.block is None or not len(run.block['timestamp']):
+                continue
+            side = 'right' if index <= top else 'left'
+            count = int(np.searchsorted(run.block['timestamp'], cutoff, side=side))
+            if count:
+                parts.append(run.take(count))
+        if not runs[top].exhausted:
+            heapq.heappush(heap, (runs[top].next_block(), top))
+        fields = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        merged = EventChunk(**fields, catalog=catalog).sorted_by_time()
+        # Up to one block per run is final at once; hand it on in block sized chunks
+        for start in range(0, len(merged), block_size):
+            yield merged.take(slice(start, start + block_size))
+
+
+def time_sorted_chunks(chunks, run_events=RUN_EVENTS, block_size=MERGE_BLOCK, directory=None):
+    # External merge sort: memory is bounded by one run while sorting and one block per run while merging
+    with tempfile.TemporaryDirectory(prefix='event_log_runs_', dir=directory) as tmp:
+        runs, catalog = write_runs(chunks, tmp, run_events)
+        yield from merge_runs(runs, catalog, block_size)
@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
 from io import BytesIO
-import random
 from datetime import datetime, timedelta
 import lib
-from lib import visualize_variant_flow
+from lib import cached_variant_flow
+from registry import ActivityRegistry
+from generator import COLLECTIVE_SHIPMENT, EventChunk, default_case_count, expected_variant_weights, generate_chunks
+from writers import write_excel
 import xml.etree.ElementTree as ET
 import re
 
@@ -24,8 +25,6 @@ ROUTE_DISTRIBUTION = {
     13: 2,
     14: 3,  # Any payment not successful
 }
-TOTAL_CASES = sum(ROUTE_DISTRIBUTION.values())
-print(TOTAL_CASES)
 
 # App Title
 st.title("Business Process Event Log Generator")
@@ -33,8 +32,6 @@ st.title("Business Process Event Log Generator")
 # Step 1: Basic Process Details
 st.header("Step 1: Process Setup")
 process_name = st.text_input("Process Name (Optional)")
-num_cases = TOTAL_CASES
-st.write(f"Total Cases to Simulate: **{TOTAL_CASES}** (Distributed across routes)")
 file_name = st.text_input("Event Log File Name", value="event_log.xlsx")
 
 st.write("---")  # Separator
@@ -69,12 +66,13 @@ DEFAULT_ACTIVITIES = [
     {"name": "Enable customer to choose any payment method", "min_time": 3, "max_time": 10, "concurrent": False, "pool": "Tchibo", "lane": "Risk Management"}
 ]
 
-# Initialize Session State with Hardcoded Activities
-if 'activities' not in st.session_state:
-    st.session_state.activities = DEFAULT_ACTIVITIES.copy()
+# Initialize Session State with Hardcoded Activities, kept under stable IDs
+if 'registry' not in st.session_state:
+    st.session_state.registry = ActivityRegistry(DEFAULT_ACTIVITIES)
+registry = st.session_state.registry
 
 def add_activity():
-    st.session_state.activities.append({
+    st.session_state.registry.add({
         "name": "", 
         "resource": "", 
         "min_time": 1,
@@ -87,26 +85,19 @@ def add_activity():
 
 st.button("Add Activity", on_click=add_activity)
 
-# Display Activity Inputs in Expanders
-for i, activity in enumerate(st.session_state.activities):
+# Display Activity Inputs in Expanders, widgets keyed by activity ID
+for i, (activity_id, activity) in enumerate(list(registry.activities.items())):
     with st.expander(f"Activity {i + 1}: {activity['name'] or 'Unnamed'}"):
         # Activity Name and Resource
         updated_name = st.text_input(
             "Activity Name",
             value=activity['name'],
-            key=f"name_{i}"
+            key=f"name_{activity_id}"
         )
 
-        # Sync name change across all variants
+        # Variants reference the activity by ID, so only the registry changes
         if updated_name != activity['name']:
-            old_name = activity['name']
-            st.session_state.activities[i]['name'] = updated_name
-
-            # Update all variants referencing this activity
-            for variant in st.session_state.variants:
-                variant['activities'] = [
-                    updated_name if act == old_name else act for act in variant['activities']
-                ]
+            registry.rename(activity_id, updated_name)
             st.rerun()
 
         # Pool and Lane Inputs
@@ -114,54 +105,54 @@ for i, activity in enumerate(st.session_state.activities):
         activity['pool'] = col3.text_input(
             "Pool", 
             value=activity['pool'], 
-            key=f"pool_{i}"
+            key=f"pool_{activity_id}"
         )
         activity['lane'] = col4.text_input(
             "Lane", 
             value=activity['lane'], 
-            key=f"lane_{i}"
+            key=f"lane_{activity_id}"
         )
         
         #Directly Update Session State for Min and Max Time Inputs
-        if f"min_time_{i}" not in st.session_state:
-            st.session_state[f"min_time_{i}"] = activity['min_time']
+        if f"min_time_{activity_id}" not in st.session_state:
+            st.session_state[f"min_time_{activity_id}"] = activity['min_time']
         
-        if f"max_time_{i}" not in st.session_state:
-            st.session_state[f"max_time_{i}"] = activity['max_time']
+        if f"max_time_{activity_id}" not in st.session_state:
+            st.session_state[f"max_time_{activity_id}"] = activity['max_time']
 
         # Time Input for Min and Max Duration (Real-time Update)
         col1, col2 = st.columns(2)
         activity['min_time'] = col1.number_input(
             "Min Time (seconds)", 
             min_value=1, 
-            value=st.session_state[f"min_time_{i}"], 
-            key=f"min_time_{i}"
+            value=st.session_state[f"min_time_{activity_id}"], 
+            key=f"min_time_{activity_id}"
         )
         activity['max_time'] = col2.number_input(
             "Max Time (seconds)", 
             min_value=1, 
-            value=st.session_state[f"max_time_{i}"], 
-            key=f"max_time_{i}"
+            value=st.session_state[f"max_time_{activity_id}"], 
+            key=f"max_time_{activity_id}"
         )
 
         # Real-time Session State Sync
-        st.session_state.activities[i]['min_time'] = st.session_state[f"min_time_{i}"]
-        st.session_state.activities[i]['max_time'] = st.session_state[f"max_time_{i}"]
+        activity['min_time'] = st.session_state[f"min_time_{activity_id}"]
+        activity['max_time'] = st.session_state[f"max_time_{activity_id}"]
         
         # Concurrency Checkbox
         activity['concurrent'] = st.checkbox(
             "Allow Parallel Execution", 
             value=activity['concurrent'], 
-            key=f"concurrent_{i}"
+            key=f"concurrent_{activity_id}"
         )
         
         # Delete Activity Button
-        if st.button(f"Delete Activity {i + 1}", key=f"delete_{i}"):
-            del st.session_state.activities[i]
+        if st.button(f"Delete Activity {i + 1}", key=f"delete_{activity_id}"):
+            registry.remove(activity_id)
             st.experimental_rerun()  # Rerun to reflect deletion immediately
 
 # --- Validation for Unique Activity Names ---
-activity_names = [a['name'] for a in st.session_state.activities]
+activity_names = registry.names()
 
 if len(activity_names) != len(set(activity_names)):
     st.error("Activity names must be unique.")
@@ -172,6 +163,8 @@ st.header("Step 3: Define Process Flow Variants")
 DEFAULT_VARIANTS = [
     {
         "name": "Route 1: Failed Stock Availability Check",
+        "route": 1,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -184,6 +177,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 2: Fraud Cancel",
+        "route": 2,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -200,6 +195,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 3: Any Payment Successful (but loop failed once)",
+        "route": 3,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -207,7 +204,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Set order to pre-paid condition",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -230,6 +227,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 4: Successful Fraud Check, Paid",
+        "route": 4,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -256,6 +255,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 5: Successful Fraud Check, Not Paid (Canceled)",
+        "route": 5,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -275,6 +276,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 6: Credit Check Prepayment, Successfully Paid",
+        "route": 6,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -282,7 +285,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Set order to pre-paid condition",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -301,6 +304,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 7: Credit Check Prepayment, Canceled/Not Paid",
+        "route": 7,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -320,6 +325,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 8: Any Payment Successful (Straightforward)",
+        "route": 8,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -327,7 +334,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Enable customer to choose any payment method",
             "Provide payment instructions to customer",
             "Mark the order as paid",
@@ -346,6 +353,8 @@ DEFAULT_VARIANTS = [
     },
     {
         "name": "Route 9: Any Payment Not Successful",
+        "route": 9,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -366,6 +375,8 @@ DEFAULT_VARIANTS = [
     {
         #Update Inventory levels doppelt vorhanden
         "name": "Route 10: Update Inventory Levels Duplicated",
+        "route": 10,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -383,6 +394,8 @@ DEFAULT_VARIANTS = [
     {
         #Mark Order as Paid was skipped
         "name": "Route 11: Mark Order as Paid Skipped",
+        "route": 11,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -390,7 +403,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Set order to pre-paid condition",
             "Provide payment instructions to customer",
             "Label order as approved",
@@ -412,6 +425,8 @@ DEFAULT_VARIANTS = [
     {
         #Aktivitäten vertrauscht (Mark the order as paid kommt nach Label order as approved)
         "name": "Route 12: Activity Order Confusion",
+        "route": 12,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -419,7 +434,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Enable customer to choose any payment method",
             "Provide payment instructions to customer",
             "Label order as approved",
@@ -440,6 +455,8 @@ DEFAULT_VARIANTS = [
     {
         #Nach Order paid ist Ende
         "name": "Route 13: After Order Paid (End)",
+        "route": 13,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -459,6 +476,8 @@ DEFAULT_VARIANTS = [
     {
         #Obwohl die Zahlung eingetroffen ist, wurde die Order gecancelt, da sie 1 Sekunde nach 15 Minuten eintraf
         "name": "Route 14: Cancel order although paid",
+        "route": 14,
+        "anomaly": False,
         "activities": [
             "Order request notification",
             "Create order request",
@@ -466,7 +485,7 @@ DEFAULT_VARIANTS = [
             "Update inventory levels",
             "Create customer order",
             "Check total price of order",
-            "Perfom customer credit check",
+            "Perform customer credit check",
             "Enable customer to choose any payment method",
             "Provide payment instructions to customer",
             "Cancel order and notify customer",
@@ -488,41 +507,51 @@ DEFAULT_VARIANTS = [
     },
 ]
 
-# Initialize Session State with Hardcoded Variants
+# Initialize Session State with Hardcoded Variants, referencing activities by ID
 if 'variants' not in st.session_state:
-    st.session_state.variants = DEFAULT_VARIANTS.copy()
+    st.session_state.variants, st.session_state.unknown_activities = [], []
+    for variant in DEFAULT_VARIANTS:
+        bound, unknown = registry.bind_variant(variant)
+        st.session_state.variants.append(bound)
+        st.session_state.unknown_activities += [(variant['name'], act, registry.suggest(act)) for act in unknown]
+
+# Names that match no activity would otherwise drop out of their variant unnoticed
+for variant_name, act, suggestion in st.session_state.unknown_activities:
+    hint = f" Did you mean '{suggestion}'?" if suggestion else ""
+    st.warning(f"{variant_name}: '{act}' is not a defined activity and was left out.{hint}")
 
 # Ensure each variant has times for all activities based on DEFAULT_ACTIVITIES
 for variant in st.session_state.variants:
-    for activity in st.session_state.activities:
-        if activity['name'] not in variant['times']:
+    for activity_id, activity in registry.activities.items():
+        if activity_id not in variant['times']:
             # If activity doesn't exist at all, set default times
-            variant['times'][activity['name']] = {
+            variant['times'][activity_id] = {
                 'min': activity['min_time'],
                 'max': activity['max_time']
             }
         else:
             # If activity exists but min/max are missing, set individually
-            if 'min' not in variant['times'][activity['name']]:
-                variant['times'][activity['name']]['min'] = activity['min_time']
-            if 'max' not in variant['times'][activity['name']]:
-                variant['times'][activity['name']]['max'] = activity['max_time']
+            if 'min' not in variant['times'][activity_id]:
+                variant['times'][activity_id]['min'] = activity['min_time']
+            if 'max' not in variant['times'][activity_id]:
+                variant['times'][activity_id]['max'] = activity['max_time']
 
 # Normalize the frequencies to ensure they sum to 100%
+# Each variant is weighted by its route (route key or "Route N" in the name), as in the generator
 normalized_frequencies = []
 total_sum = 0
+variant_weights = expected_variant_weights(st.session_state.variants, ROUTE_DISTRIBUTION)
+total_weight = sum(variant_weights)
 
-for i, variant in enumerate(st.session_state.variants):
-    route_number = i + 1  # Route numbers 1-9
-    raw_frequency = ROUTE_DISTRIBUTION.get(route_number, 0)
-    frequency = (raw_frequency / TOTAL_CASES) * 100
+for weight in variant_weights:
+    frequency = (weight / total_weight) * 100 if total_weight else 0
     rounded_frequency = round(frequency, 10)  # Limit to avoid floating-point issues
     normalized_frequencies.append(rounded_frequency)
     total_sum += rounded_frequency
 
 # Adjust for rounding error
 rounding_error = 100 - total_sum
-if rounding_error != 0:
+if total_sum and rounding_error != 0:
     normalized_frequencies[-1] += rounding_error  # Adjust last variant to balance to 100%
 
 # Assign the corrected frequencies back
@@ -530,13 +559,10 @@ for i, variant in enumerate(st.session_state.variants):
     variant['frequency'] = normalized_frequencies[i]
 
 def add_variant():
-    default_times = {
-        a['name']: {'min': a['min_time'], 'max': a['max_time']} 
-        for a in st.session_state.activities
-    }
+    default_times = st.session_state.registry.default_times()
     st.session_state.variants.append({
         "name": "",
-        "activities": [],
+        "activity_ids": [],
         "frequency": 0,
         "times": default_times
     })
@@ -561,35 +587,34 @@ for v_index, variant in enumerate(st.session_state.variants):
         st.write(f"**Frequency:** {variant['frequency']}%")
 
         # --- Update Selected Activities ---
-        selected_activities = st.multiselect(
+        selected_ids = st.multiselect(
             f"Select Activities for Variant {v_index + 1}",
-            options=[a['name'] for a in st.session_state.activities],
-            default=[
-                act for act in variant['activities'] if act in [a['name'] for a in st.session_state.activities]
-            ],
+            options=list(registry.activities),
+            default=[act for act in variant['activity_ids'] if act in registry],
+            format_func=registry.name_of,
             key=f"select_activities_{v_index}"
         )
-        if selected_activities != variant['activities']:
-            st.session_state.variants[v_index]['activities'] = selected_activities
+        if selected_ids != variant['activity_ids']:
+            st.session_state.variants[v_index]['activity_ids'] = selected_ids
 
         # --- Adjust Time Ranges (Optional Per Variant) ---
-        if selected_activities:
+        if selected_ids:
             adjust_times_toggle = st.toggle(
                 f"Adjust Time Ranges for Variant {v_index + 1}",
                 key=f"toggle_{v_index}"
             )
             
             if adjust_times_toggle:
-                for act in selected_activities:
+                for act in selected_ids:
                     col1, col2 = st.columns(2)
                     act_min = col1.number_input(
-                        f"{act} - Min Time (seoconds)",
+                        f"{registry.name_of(act)} - Min Time (seoconds)",
                         min_value=None,
                         value=variant['times'].get(act, {}).get('min', 1),
                         key=f"min_time_variant_{v_index}_{act}"
                     )
                     act_max = col2.number_input(
-                        f"{act} - Max Time (seconds)",
+                        f"{registry.name_of(act)} - Max Time (seconds)",
                         min_value=None,
                         value=variant['times'].get(act, {}).get('max', 5),
                         key=f"max_time_variant_{v_index}_{act}"
@@ -600,9 +625,14 @@ for v_index, variant in enumerate(st.session_state.variants):
                         st.session_state.variants[v_index]['times'][act] = {'min': act_min, 'max': act_max}
 
         # --- Visualize the Flow of Activities for this Variant ---
-        if selected_activities:
+        # Streamlit runs collapsed expanders too, so the diagram is only drawn on request
+        if selected_ids and st.toggle(f"Show Process Flow for Variant {v_index + 1}", key=f"show_flow_{v_index}"):
+            named = registry.named_variant(variant)
             st.subheader("Process Flow Visualization")
-            st.graphviz_chart(visualize_variant_flow(variant['name'], selected_activities))
+            try:
+                st.graphviz_chart(cached_variant_flow(named['name'], named['activities'], named.get('parallel', [])))
+            except ValueError as e:
+                st.error(str(e))  # the generator rejects this variant too
 
         # --- Delete Variant Button ---
         if st.button(f"Delete Variant {v_index + 1}", key=f"delete_variant_{v_index}"):
@@ -621,6 +651,11 @@ if total_frequency != 100:
 # Step 4: Generate Event Log
 st.header("Step 4: Generate Event Log")
 
+# By default as many cases as the variant pool holds, like the generator and the CLI
+pool_cases = max(1, default_case_count(st.session_state.variants, ROUTE_DISTRIBUTION))
+num_cases = st.number_input("Total Cases to Simulate", min_value=1, value=pool_cases, step=1)
+st.write(f"Cases are distributed across routes by ROUTE_DISTRIBUTION (default: **{pool_cases}** cases)")
+
 # Date Inputs for Case Start Time
 start_date = st.date_input("Select Start Date", value=datetime.today())
 end_date = st.date_input("Select End Date", value=datetime.today() + timedelta(days=7))
@@ -629,211 +664,40 @@ end_date = st.date_input("Select End Date", value=datetime.today() + timedelta(d
 min_case_gap = st.number_input("Minimum Gap Between Cases (seconds)", min_value=0, value=600)
 max_case_gap = st.number_input("Maximum Gap Between Cases (seconds)", min_value=900, value=1800)
 
+# Arrival Process for Case Start Times
+ARRIVAL_PROCESSES = {
+    "Random start within the date window": "window",
+    "Sequential with case gaps": "gaps",
+    "Poisson over the date window": "poisson",
+    "Poisson weighted by time of day": "weighted",
+}
+arrival_process = st.selectbox("Arrival Process", list(ARRIVAL_PROCESSES))
+
 if st.button("Generate Event Log"):
-    if not st.session_state.activities or not st.session_state.variants:
-        st.error("Please add at least one activity and one variant before generating the event log.")
-    elif start_date > end_date:
-        st.error("End date must be after start date.")
+    try:
+        chunks = list(generate_chunks(
+            registry.to_list(),
+            [registry.named_variant(variant) for variant in st.session_state.variants],
+            ROUTE_DISTRIBUTION,
+            start_date,
+            end_date,
+            min_case_gap=min_case_gap,
+            max_case_gap=max_case_gap,
+            num_cases=int(num_cases),
+            arrivals=ARRIVAL_PROCESSES[arrival_process],
+            start_hours=(6, 22),
+            start_minutes=(1, 59),
+            collective_activity=COLLECTIVE_SHIPMENT
+        ))
+    except ValueError as e:
+        st.error(str(e))
     else:
-        event_log = []
-        route_case_counter = {route: 1 for route in ROUTE_DISTRIBUTION.keys()}
-        total_cases = sum(ROUTE_DISTRIBUTION.values())
-        variant_pool = []
-
-        case_prefix = "R"
-        last_case_end_time = None
-
-        # Bulk Shipment Queue and Timer
-        shipment_queue = []
-        next_bulk_shipment_time = None
-
-        # --- Fill Variant Pool Based on Exact Distribution ---
-        # --- Fill Variant Pool Based on Exact Distribution ---
-        for route, num_cases in ROUTE_DISTRIBUTION.items():
-            matching_variants = [
-                v for v in st.session_state.variants if f"Route {route}" in v['name']
-            ]
-            
-            # Add up to the required number of cases
-            selected_variants = matching_variants[:num_cases]
-            variant_pool.extend(selected_variants)
-            
-            print(f"Route {route}: Adding {len(selected_variants)} variants (Required: {num_cases})")
-
-            if len(matching_variants) > num_cases:
-                print(f"Warning: Route {route} has {len(matching_variants)} cases, trimming to {num_cases}.")
-                matching_variants = matching_variants[:num_cases]
-            
-            # Add cases to pool
-            for variant in matching_variants:
-                variant_pool.extend([variant] * num_cases)
-                print(variant['name'], num_cases)
-
-        # --- Generate Cases for Each Variant ---
-        for variant in variant_pool:  # Randomly select a variant from the pool
-            route_number = int(variant['name'].split(':')[0].split()[-1])
-            case_num = route_case_counter[route_number]
-            route_case_counter[route_number] += 1
-
-            case_id_formatted = (
-                f"{case_prefix}{route_number}_{str(case_num).zfill(2)}"
-            )
-
-            # Berechne die Differenz zwischen Start- und Enddatum
-            date_diff = (end_date - start_date).days
-
-            # Berechne die Anzahl der Fälle, die generiert werden sollen
-            total_cases = sum(ROUTE_DISTRIBUTION.values())
-
-            # Berechne den maximalen Zeitraum, der durch die Gaps benötigt wird
-            max_required_gap = (total_cases - 1) * max_case_gap / 86400  # in Tagen (3600 Sekunden * 24 Stunden)
-
-            # Überprüfe, ob der Zeitraum zwischen Start- und Enddatum ausreichend ist
-            if date_diff < max_required_gap:
-                st.error("Der Zeitraum zwischen Start- und Enddatum ist zu kurz, um die gewünschten 'Case Gaps' zu berücksichtigen. Bitte wähle einen längeren Zeitraum.")
-            else:
-                # Jetzt ist sichergestellt, dass der Zeitraum ausreichend ist
-                # Hier wird weiterhin eine zufällige Startzeit für jeden Fall generiert
-                case_start_time = datetime.combine(
-                    random.choice(pd.date_range(start_date, end_date).tolist()),  # Umwandlung in Liste und Auswahl eines zufälligen Datums
-                    datetime.min.time()
-                ) + timedelta(hours=random.randint(6, 22), minutes=random.randint(1, 59))  # Der Fall beginnt zwischen 8 Uhr und 16 Uhr
-
-                start_time = case_start_time
-                last_activity_time = start_time
-            
-            # --- Generate Activities for the Case --- 
-            bulk_shipment_schedule = {}
-            pending_cases = {}
-
-            # --- Generate Activities for the Case ---
-            for act in variant['activities']:
-                activity_info = next((a for a in st.session_state.activities if a['name'] == act), {})
-
-                # Default activity timing if not set
-                if act not in variant['times']:
-                    variant['times'][act] = {
-                        'min': activity_info.get('min_time', 60),
-                        'max': activity_info.get('max_time', 300)
-                    }
-
-                if act == "Create collective shipment order and send to TM":
-                    case_hour = start_time.replace(minute=0, second=0)  # Track by hour, not day
-                    
-                    # Queue shipment per hour and route if not already scheduled
-                    if (case_hour, route_number) not in bulk_shipment_schedule:
-                        bulk_shipment_schedule[(case_hour, route_number)] = case_hour + timedelta(hours=1)
-                        
-                        shipment_queue.append({
-                            'case_id': case_id_formatted,
-                            'route': route_number,
-                            'activity': act,
-                            'start_time': start_time,
-                            'pool': activity_info.get('pool', 'N/A'),
-                            'lane': activity_info.get('lane', 'N/A'),
-                            'shipment_time': bulk_shipment_schedule[(case_hour, route_number)]
-                        })
-                    
-                    # Store pending post-shipment activities for this case
-                    pending_cases[case_id_formatted] = {
-                        'remaining_activities': variant['activities'][variant['activities'].index(act) + 1:],
-                        'start_time': bulk_shipment_schedule[(case_hour, route_number)]
-                    }
-                    
-                    break  # Stop processing further activities for this case until shipment is handled
-
-                # --- Process Pre-Shipment Activities --- #
-                act_time_range = variant['times'].get(act, {})
-                min_time = act_time_range.get('min', 60)
-                max_time = act_time_range.get('max', 300)
-
-                base_duration = random.randint(min_time, max_time)
-                jitter = random.randint(-4, 4)
-                duration = max(1, base_duration + jitter)
-
-                end_time = start_time + timedelta(seconds=duration)
-
-                # Log pre-shipment activity
-                event_log.append({
-                    'Case ID': case_id_formatted,
-                    'Activity': act,
-                    'Timestamp': start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    'Pool': activity_info.get('pool', 'N/A'),
-                    'Lane': activity_info.get('lane', 'N/A'),
-                    'Route': f"Route {route_number}"
-                })
-
-                # Increment time for sequential activities
-                if not activity_info.get('concurrent', False):
-                    start_time += timedelta(seconds=duration)
-
-            # --- Process Shipments (Per Hour Per Route) --- 
-            processed_shipments = set()
-
-            for shipment in shipment_queue:
-                shipment_key = (shipment['shipment_time'], shipment['route'], shipment['case_id'])  # Key by hour, route, and case
-
-                # Log shipment only if not already processed for this case, hour, and route
-                if shipment_key not in processed_shipments:
-                    # Determine the duration of the shipment activity
-                    shipment_duration_range = variant['times'].get(
-                        "Create collective shipment order and send to TM", 
-                        {'min': 1800, 'max': 1800}  # Default 30 min
-                    )
-                    shipment_base_duration = random.randint(
-                        shipment_duration_range['min'], 
-                        shipment_duration_range['max']
-                    )
-                    jitter = random.randint(-4, 4)
-                    shipment_duration = max(1, shipment_base_duration + jitter)
-                    
-                    event_log.append({
-                        'Case ID': shipment['case_id'],
-                        'Activity': shipment['activity'],
-                        'Timestamp': shipment['shipment_time'].strftime("%Y-%m-%d %H:%M:%S"),
-                        'Pool': shipment['pool'],
-                        'Lane': shipment['lane'],
-                        'Route': f"Route {shipment['route']}",
-                        'Anomaly': 'No'
-                    })
-                    processed_shipments.add(shipment_key)  # Mark as processed for this case
-
-                # Resume post-shipment activities for the specific case
-                if shipment['case_id'] in pending_cases:
-                    remaining_acts = pending_cases[shipment['case_id']]['remaining_activities']
-                    start_after_shipment = shipment['shipment_time']
-
-                    for remaining_act in remaining_acts:
-                        activity_info = next((a for a in st.session_state.activities if a['name'] == remaining_act), {})
-                        act_time_range = variant['times'].get(remaining_act, {})
-                        min_time = act_time_range.get('min', 60)
-                        max_time = act_time_range.get('max', 300)
-
-                        base_duration = random.randint(min_time, max_time)
-                        jitter = random.randint(-4, 4)
-                        duration = max(1, base_duration + jitter)
-
-                        event_log.append({
-                            'Case ID': shipment['case_id'],
-                            'Activity': remaining_act,
-                            'Timestamp': start_after_shipment.strftime("%Y-%m-%d %H:%M:%S"),
-                            'Pool': activity_info.get('pool', 'N/A'),
-                            'Lane': activity_info.get('lane', 'N/A'),
-                            'Route': f"Route {shipment['route']}"
-                        })
-
-                        start_after_shipment += timedelta(seconds=duration)
-
-        # --- Sorting Event Log by Timestamp ---
-        event_log = sorted(event_log, key=lambda x: datetime.strptime(x['Timestamp'], "%Y-%m-%d %H:%M:%S"))
-
-        # Convert to DataFrame
-        df = pd.DataFrame(event_log)
+        # --- Sorting Event Log by Timestamp (integer epoch seconds) ---
+        event_log = EventChunk.concat(chunks).sorted_by_time()
 
         # Export to Excel
         output = BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, index=False, sheet_name='Event Log')
+        write_excel([event_log], output)
 
         st.download_button(
             label="Download Event Log",
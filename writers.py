@@ -0,0 +1,279 @@
+import gzip
+import io
+import os
+import sys
+from xml.sax.saxutils import quoteattr
+
+import numpy as np
+
+from generator import LIFECYCLE_TRANSITIONS, output_columns
+
+TEXT_BUFFER_SIZE = 1 << 20
+CSV_LINE_END = '\r\n'  # same as csv.writer
+
+
+# --- Text Output ---
+def write_text(parts, path, header, footer='', compress=False):
+    # parts are (event count, text) pairs as returned by the chunk encoders
+    if path == '-':
+        raw = sys.stdout.buffer
+    elif isinstance(path, str):
+        raw = open(path, 'wb', buffering=TEXT_BUFFER_SIZE)
+    else:
+        raw = path  # binary file object, e.g. BytesIO
+    binary = gzip.GzipFile(fileobj=raw, mode='wb') if compress else raw
+    out = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+    count = 0
+    try:
+        out.write(header)
+        for events, text in parts:
+            out.write(text)
+            count += events
+        out.write(footer)
+        out.flush()
+    finally:
+        out.detach()
+        if compress:
+            binary.close()
+        if isinstance(path, str) and path != '-':
+            raw.close()
+    return count
+
+
+# --- CSV Export ---
+def csv_quote(value):
+    # Minimal quoting like csv.writer; only needed for names, all other columns are plain
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def csv_chunk(chunk, lifecycle=None):
+    # (event count, CSV rows) for one chunk
+    if not len(chunk):
+        return 0, ''
+    columns = chunk.columns(csv_quote, lifecycle=lifecycle)
+    return len(columns[0]), CSV_LINE_END.join(map(','.join, zip(*columns))) + CSV_LINE_END
+
+
+def write_csv(chunks, path, encoded=False, lifecycle=None):
+    # One write per chunk through a large file buffer, nothing is kept between chunks
+    parts = chunks if encoded else (csv_chunk(chunk, lifecycle) for chunk in chunks)
+    return write_text(parts, path, ','.join(output_columns(lifecycle)) + CSV_LINE_END)
+
+
+# --- Excel Export ---
+EXCEL_MAX_ROWS = 1_048_576  # per worksheet, including the header row
+EXCEL_EPOCH_DAYS = 25569  # Excel serial date of 1970-01-01
+EXCEL_TIMESTAMP_FORMAT = 'yyyy-mm-dd hh:mm:ss'
+
+
+def excel_part_path(path, part):
+    # event_log.xlsx, event_log_2.xlsx, event_log_3.xlsx, ...
+    if part == 1:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_{part}{ext}"
+
+
+def write_excel(chunks, path, max_rows=EXCEL_MAX_ROWS, split_files=False, lifecycle=None):
+    # constant_memory rows; a full sheet continues on the next sheet (or file with split_files)
+    import xlsxwriter  # only needed for this format
+
+    if split_files and not isinstance(path, str):
+        raise ValueError("Splitting into several files needs an output path")
+    rows_per_sheet = max_rows - 1
+    columns_out = output_columns(lifecycle)
+    time_columns = [i for i, name in enumerate(columns_out) if name in ('Timestamp', 'End Timestamp')]
+    workbook = sheet = None
+    part = count = 0
+    row = rows_per_sheet
+
+    def next_sheet():
+        nonlocal workbook, sheet, part, row
+        part += 1
+        if split_files or workbook is None:
+            if workbook is not None:
+                workbook.close()
+            target = excel_part_path(path, part) if split_files else path
+            workbook = xlsxwriter.Workbook(target, {'constant_memory': True})
+        name = 'Event Log' if split_files or part == 1 else f'Event Log {part}'
+        sheet = workbook.add_worksheet(name)
+        # Timestamps are written as Excel date numbers, shown through the column format
+        time_format = workbook.add_format({'num_format': EXCEL_TIMESTAMP_FORMAT})
+        for column in time_columns:
+            sheet.set_column(column, column, 19, time_format)
+        sheet.write_row(0, 0, columns_out)
+        row = 0
+
+    try:
+        for chunk in chunks:
+            columns = chunk.columns(format_timestamps=False, lifecycle=lifecycle)
+            for column in time_columns:
+                columns[column] = (np.array(columns[column]) / 86400 + EXCEL_EPOCH_DAYS).tolist()
+            for values in zip(*columns):
+                if row == rows_per_sheet:
+                    next_sheet()
+                row += 1
+                sheet.write_row(row, 0, values)
+            count += len(columns[0])
+        if workbook is None:
+            next_sheet()  # header only for an empty log
+    finally:
+        if workbook is not None:
+            workbook.close()
+    return count
+
+
+# --- Parquet Export ---
+def _dictionary(indices, names):
+    import pyarrow as pa
+    return pa.DictionaryArray.from_arrays(pa.array(indices, type=pa.int32()), pa.array(names, type=pa.string()))
+
+
+def parquet_schema(lifecycle=None):
+    import pyarrow as pa
+    names = pa.dictionary(pa.int32(), pa.string())
+    fields = [
+        ('Case ID', pa.string()),
+        ('Activity', names),
+        ('Timestamp', pa.timestamp('s')),
+        ('Pool', names),
+        ('Lane', names),
+        ('Route', names),
+        ('Anomaly', names),
+    ]
+    if lifecycle == 'end':
+        fields.append(('End Timestamp', pa.timestamp('s')))
+    elif lifecycle == 'pairs':
+        fields.append(('Lifecycle', names))
+    return pa.schema(fields)
+
+
+def parquet_table(chunk, lifecycle=None):
+    # Arrow table for one chunk: dictionary-encoded names and native timestamp columns
+    import pyarrow as pa
+
+    if lifecycle == 'pairs':
+        chunk = chunk.lifecycle_pairs()
+    routes, route_index = np.unique(chunk.route, return_inverse=True)
+    arrays = [
+        pa.array(chunk.case_ids(), type=pa.string()),
+        _dictionary(chunk.activity, chunk.catalog.activity_names),
+        pa.array(chunk.timestamp, type=pa.timestamp('s')),
+        _dictionary(chunk.pool, chunk.catalog.pool_names),
+        _dictionary(chunk.lane, chunk.catalog.lane_names),
+        _dictionary(route_index, [f"Route {route}" for route in routes.tolist()]),
+        _dictionary(chunk.anomaly.astype(np.int32), ['No', 'Yes']),
+    ]
+    if lifecycle == 'end':
+        arrays.append(pa.array(chunk.timestamp + chunk.duration, type=pa.timestamp('s')))
+    elif lifecycle == 'pairs':
+        arrays.append(_dictionary(chunk.transition.astype(np.int32), LIFECYCLE_TRANSITIONS.tolist()))
+    return pa.Table.from_arrays(arrays, schema=parquet_schema(lifecycle))
+
+
+def write_parquet(chunks, path, lifecycle=None):
+    # One row group per chunk, written as soon as the chunk is generated
+    import pyarrow.parquet as pq  # only needed for this format
+
+    count = 0
+    with pq.ParquetWriter(path, parquet_schema(lifecycle), compression='zstd') as writer:
+        for chunk in chunks:
+            table = parquet_table(chunk, lifecycle)
+            writer.write_table(table)
+            count += table.num_rows
+    return count
+
+
+# --- XES Export ---
+XES_HEADER = """<?xml version="1.0" encoding="UTF-8" ?>
+<log xes.version="1.0" xes.features="nested-attributes" xmlns="http://www.xes-standard.org/">
+\t<extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext"/>
+\t<extension name="Time" prefix="time" uri="http://www.xes-standard.org/time.xesext"/>
+\t<extension name="Organizational" prefix="org" uri="http://www.xes-standard.org/org.xesext"/>
+\t<global scope="trace">
+\t\t<string key="concept:name" value="__INVALID__"/>
+\t</global>
+\t<global scope="event">
+\t\t<string key="concept:name" value="__INVALID__"/>
+\t\t<date key="time:timestamp" value="1970-01-01T00:00:00"/>
+\t</global>
+\t<classifier name="Activity" keys="concept:name"/>
+"""
+XES_FOOTER = "</log>\n"
+XES_LIFECYCLE_EXTENSION = (
+    '\t<extension name="Lifecycle" prefix="lifecycle" uri="http://www.xes-standard.org/lifecycle.xesext"/>\n'
+)
+
+
+def xes_header(lifecycle=None):
+    if not lifecycle:
+        return XES_HEADER
+    # Lifecycle extension next to the others, before the globals
+    at = XES_HEADER.index('\t<global')
+    return XES_HEADER[:at] + XES_LIFECYCLE_EXTENSION + XES_HEADER[at:]
+
+
+def _xes_string(key, value):
+    return f'<string key="{key}" value={quoteattr(value)}/>'
+
+
+def xes_chunk(chunk, lifecycle=None):
+    # (event count, XML text) for all traces of one chunk; a case never spans two chunks.
+    # With a lifecycle mode every activity becomes a start and a complete event.
+    if lifecycle:
+        chunk = chunk.lifecycle_pairs()
+    catalog = chunk.catalog
+    event_heads = np.array([
+        f"\t\t<event>\n\t\t\t{_xes_string('concept:name', act)}\n"
+        f"\t\t\t{_xes_string('org:group', catalog.lane_names[lane])}\n"
+        f"\t\t\t{_xes_string('pool', catalog.pool_names[pool])}\n"
+        f'\t\t\t<date key="time:timestamp" value="'
+        for act, pool, lane in zip(
+            catalog.activity_names, catalog.activity_pool.tolist(), catalog.activity_lane.tolist()
+        )
+    ], dtype=object)
+    events = event_heads[chunk.activity] + chunk.formatted_timestamps('T') + '"/>\n'
+    if chunk.transition is not None:
+        events = events + np.array([
+            f"\t\t\t{_xes_string('lifecycle:transition', transition)}\n" for transition in LIFECYCLE_TRANSITIONS
+        ], dtype=object)[chunk.transition]
+    events = events + '\t\t</event>\n'
+
+    firsts = chunk.case_starts()
+    bounds = np.r_[firsts, len(chunk)].tolist()
+    parts = []
+    for i, (case_id, route, anomaly) in enumerate(zip(
+        chunk.case_ids(per_case=True).tolist(), chunk.route[firsts].tolist(), chunk.anomaly[firsts].tolist()
+    )):
+        parts.append(
+            f"\t<trace>\n\t\t{_xes_string('concept:name', case_id)}\n"
+            f"\t\t{_xes_string('route', f'Route {route}')}\n"
+            f"\t\t{_xes_string('anomaly', 'Yes' if anomaly else 'No')}\n"
+        )
+        parts.extend(events[bounds[i]:bounds[i + 1]].tolist())
+        parts.append("\t</trace>\n")
+    return len(chunk), ''.join(parts)
+
+
+def write_xes(chunks, path, compress=None, encoded=False, lifecycle=None):
+    # Streams one <trace> per case; gzip when compress is set or the path ends in .gz
+    if compress is None:
+        compress = isinstance(path, str) and path.endswith('.gz')
+    parts = chunks if encoded else (xes_chunk(chunk, lifecycle) for chunk in chunks)
+    return write_text(parts, path, xes_header(lifecycle), XES_FOOTER, compress=compress)
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_excel,
+    'parquet': write_parquet,
+    'xes': write_xes,
+}
+
+# Chunk encoders that can run inside generator workers (see generate_chunks(encode=...))
+ENCODERS = {
+    'csv': csv_chunk,
+    'xes': xes_chunk,
+}